@@ -286,8 +286,8 @@ Generate insights and recommendations:""")
         
         # Analyze text mood
         if preprocessed_texts:
-            for text in preprocessed_texts[:3]:  # Analyze up to 3 texts to reduce LLM calls
-                mood_result = self.mood_analyzer.analyze_text(text)
+            # Analyze up to 3 texts to reduce LLM calls
+            for mood_result in self.mood_analyzer.analyze_batch(preprocessed_texts[:3]):
                 mood_scores.append(mood_result['mood_score'])
         
         # Analyze typing patterns
@@ -14,6 +14,7 @@ from agents.base_agent import BaseAgent
 from agents.state import AgentState
 from motivation.intervention_rules import InterventionRuleEngine, InterventionTrigger
 from motivation.message_generator import PersonalizedMessageGenerator
+from motivation.message_batching import BatchingMessageService
 from motivation.effectiveness_tracker import InterventionEffectivenessTracker
 from services.intervention_storage import InterventionStorageService
 from config.redis_client import redis_client
@@ -27,6 +28,11 @@ class MotivationAgent(BaseAgent):
         super().__init__(name)
         self.rule_engine = InterventionRuleEngine()
         self.message_generator = PersonalizedMessageGenerator(self.llm)
+        # Optionally coalesce messages across concurrent executions into batched LLM calls
+        self.message_batcher = (
+            BatchingMessageService(self.message_generator)
+            if settings.INTERVENTION_MESSAGE_BATCHING_ENABLED else None
+        )
         self.intervention_storage = InterventionStorageService()
         self.effectiveness_tracker = InterventionEffectivenessTracker()
         self.logger = logging.getLogger("MotivationAgent")
@@ -188,7 +194,8 @@ class MotivationAgent(BaseAgent):
             Personalized message string
         """
         try:
-            message = await self.message_generator.generate_message(
+            generator = self.message_batcher or self.message_generator
+            message = await generator.generate_message(
                 intervention_type=intervention_type,
                 context=context,
                 student_profile=student_profile
@@ -17,6 +17,8 @@ class AgentState(TypedDict):
     cognitive_load_score: float
     cognitive_load_history: List[float]
     mental_fatigue_level: str  # low, medium, high, critical
+    cognitive_patterns: Dict  # detected pattern flags, e.g. error_clustering_detected
+    avoidance_behavior: Dict  # avoided_topics and related signals
     
     # Performance data
     performance_metrics: Dict
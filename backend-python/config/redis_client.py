@@ -1,3 +1,4 @@
+import redis
 import redis.asyncio as aioredis
 from redis.asyncio import Redis
 from typing import List, Dict, Optional
@@ -9,6 +10,9 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Synchronous clients shared across callers, keyed by Redis URL
+_SYNC_CLIENTS: Dict[str, redis.Redis] = {}
+
 
 class RedisClient:
     """Redis client wrapper with helper methods"""
@@ -224,3 +228,34 @@ class RedisClient:
 
 # Global Redis client instance
 redis_client = RedisClient()
+
+
+def get_sync_redis(url: Optional[str] = None) -> redis.Redis:
+    """
+    Return a shared synchronous Redis client for the given URL.
+    
+    The client (and its connection pool) is created and PINGed once per URL,
+    so handlers constructing analyzers per request reuse open connections.
+    A client that fails its PING is discarded so the next call reconnects.
+    
+    Args:
+        url: Redis URL (defaults to settings.REDIS_URL)
+        
+    Returns:
+        Connected redis.Redis client
+    """
+    url = url or settings.REDIS_URL
+    client = _SYNC_CLIENTS.get(url)
+    if client is not None:
+        return client
+    
+    client = redis.Redis.from_url(url, max_connections=10, health_check_interval=30)
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        client.close()
+        logger.error(f"❌ Redis connection failed: {url}")
+        raise
+    
+    _SYNC_CLIENTS[url] = client
+    return client
@@ -31,6 +31,12 @@ class Settings(BaseSettings):
     INTERVENTION_CRITICAL_BYPASS_THROTTLE: bool = True
     INTERVENTION_EFFECTIVENESS_WINDOW_MINUTES: int = 15
     INTERVENTION_MESSAGE_CACHE_TTL_SECONDS: int = 300
+    INTERVENTION_SEMANTIC_CACHE_ENABLED: bool = False
+    INTERVENTION_SEMANTIC_CACHE_MODEL: str = "redis/langcache-embed-v1"
+    INTERVENTION_SEMANTIC_CACHE_DISTANCE_THRESHOLD: float = 0.15
+    INTERVENTION_MESSAGE_BATCHING_ENABLED: bool = False
+    INTERVENTION_BATCH_MAX_SIZE: int = 32
+    INTERVENTION_BATCH_FLUSH_INTERVAL_MS: int = 50
     
     class Config:
         env_file = ".env"
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
@@ -11,6 +12,8 @@ from api.bridge import router as bridge_router
 from services.event_consumer import event_consumer
 from services.pubsub_handler import pubsub_listener
 from services.clr_maintenance import clr_maintenance_service
+from motivation.effectiveness_tracker import effectiveness_tracker
+from agents.graph import motivation_agent
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +44,9 @@ async def lifespan(app: FastAPI):
         # Start CLR maintenance service
         await clr_maintenance_service.start()
         
+        # Run queued intervention effectiveness measurements
+        await effectiveness_tracker.start()
+        
         logger.info("✅ Python Backend started successfully")
         logger.info(f"📡 API available at http://0.0.0.0:8000")
         logger.info(f"📚 API docs at http://0.0.0.0:8000/docs")
@@ -61,6 +67,9 @@ async def lifespan(app: FastAPI):
         await event_consumer.stop()
         await pubsub_listener.stop()
         await clr_maintenance_service.stop()
+        await effectiveness_tracker.stop()
+        if motivation_agent.message_batcher is not None:
+            await motivation_agent.message_batcher.stop()
         
         # Close connections
         await redis_client.disconnect()
@@ -77,7 +86,9 @@ app = FastAPI(
     title="Adaptive Student Navigator - Python Backend",
     description="AI Agent orchestration service with LangGraph",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Serialize responses with orjson instead of the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
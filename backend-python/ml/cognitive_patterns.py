@@ -12,16 +12,98 @@ beyond simple weighted averages. It analyzes behavioral sequences to identify:
 - Night productivity degradation
 """
 
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, NamedTuple
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
 import statistics
 import math
+import re
+import time
+
+MS_PER_MINUTE = 60_000
+MS_PER_HOUR = 3_600_000
+MS_PER_DAY = 86_400_000
+
+# Single-byte codes for event types so type sequences can be searched as bytes
+EVENT_TYPE_CODES = {
+    'IDLE': 0,
+    'NAVIGATION': 1,
+    'ERROR': 2,
+    'CLICK': 3,
+    'SCROLL': 4,
+    'TYPING_PATTERN': 5
+}
+UNKNOWN_EVENT_CODE = 255
+
+# Overlapping IDLE -> NAVIGATION -> IDLE matches via zero-width lookahead
+_PROCRASTINATION_LOOP_PATTERN = re.compile(
+    b'(?=' + re.escape(bytes([
+        EVENT_TYPE_CODES['IDLE'],
+        EVENT_TYPE_CODES['NAVIGATION'],
+        EVENT_TYPE_CODES['IDLE']
+    ])) + b')'
+)
+
+
+class EventRecord(NamedTuple):
+    """Behavioral event normalized to the fixed event schema."""
+    timestamp: float
+    type: Optional[str]
+    duration: float
+    metadata: Dict
+    
+    @classmethod
+    def from_event(cls, event: Dict) -> 'EventRecord':
+        """Build a record from a raw event dict, applying schema defaults."""
+        return cls(
+            event.get('timestamp', 0),
+            event.get('type'),
+            event.get('duration', 0),
+            event.get('metadata', {})
+        )
+
+
+def encode_event_types(events: List[Dict]) -> bytes:
+    """Encode the event type sequence as one byte per event."""
+    return bytes(EVENT_TYPE_CODES.get(e.get('type'), UNKNOWN_EVENT_CODE) for e in events)
+
+
+def count_windows(timestamps: List[float], k: int, window_ms: float) -> int:
+    """
+    Count positions where k consecutive timestamps span at most window_ms.
+    
+    For ordered timestamps this equals the number of starts whose window
+    holds at least k timestamps, found with one linear pass instead of a
+    binary search per start.
+    """
+    return sum(1 for start, end in zip(timestamps, timestamps[k - 1:]) if end - start <= window_ms)
+
+
+@lru_cache(maxsize=1024)
+def _local_utc_offset_ms(utc_hour: int) -> int:
+    """Local UTC offset for a given UTC hour since the epoch, cached per hour."""
+    return time.localtime(utc_hour * 3600).tm_gmtoff * 1000
+
+
+def _to_local_ms(timestamp_ms: float) -> int:
+    """Convert a UTC millisecond timestamp to local milliseconds since the epoch."""
+    timestamp_ms = int(timestamp_ms)
+    return timestamp_ms + _local_utc_offset_ms(timestamp_ms // MS_PER_HOUR)
 
 
 class PatternFeatureExtractor:
     """Converts raw behavioral events into feature vectors for pattern detection."""
     
+    # Contextual count features and the event type each one counts
+    CONTEXTUAL_COUNT_FEATURES = (
+        ('navigation_count', 'NAVIGATION'),
+        ('click_count', 'CLICK'),
+        ('scroll_count', 'SCROLL'),
+        ('typing_count', 'TYPING_PATTERN'),
+        ('idle_count', 'IDLE')
+    )
+    
     def __init__(self):
         self.event_buffer = deque(maxlen=1000)  # Keep last 1000 events
         
@@ -38,8 +120,11 @@ class PatternFeatureExtractor:
         if not events:
             return self._empty_features()
             
-        # Sort events by timestamp
-        sorted_events = sorted(events, key=lambda e: e.get('timestamp', 0))
+        # Sort events by timestamp (streams usually arrive already ordered)
+        if self._is_sorted(events):
+            sorted_events = events
+        else:
+            sorted_events = sorted(events, key=lambda e: e.get('timestamp', 0))
         
         # Time-based features
         time_features = self._extract_time_features(sorted_events)
@@ -60,20 +145,35 @@ class PatternFeatureExtractor:
             **contextual_features
         }
     
+    @staticmethod
+    def _is_sorted(events: List[Dict]) -> bool:
+        """Check in a single pass whether events are in chronological order."""
+        last = float('-inf')
+        for event in events:
+            timestamp = event.get('timestamp', 0)
+            if timestamp < last:
+                return False
+            last = timestamp
+        return True
+    
     def _extract_time_features(self, events: List[Dict]) -> Dict:
         """Extract time-based features."""
         if not events:
             return {}
             
-        timestamps = [e.get('timestamp', 0) for e in events]
-        first_time = datetime.fromtimestamp(timestamps[0] / 1000)
-        last_time = datetime.fromtimestamp(timestamps[-1] / 1000)
+        first_ts = events[0].get('timestamp', 0)
+        last_ts = events[-1].get('timestamp', 0)
+        
+        local_ms = _to_local_ms(first_ts)
+        hour = (local_ms // MS_PER_HOUR) % 24
+        # Unix epoch fell on a Thursday (weekday 3)
+        weekday = (local_ms // MS_PER_DAY + 3) % 7
         
         return {
-            'hour_of_day': first_time.hour,
-            'day_of_week': first_time.weekday(),
-            'session_duration_minutes': (last_time - first_time).total_seconds() / 60,
-            'is_night_hours': 22 <= first_time.hour or first_time.hour <= 6
+            'hour_of_day': hour,
+            'day_of_week': weekday,
+            'session_duration_minutes': (last_ts - first_ts) / MS_PER_MINUTE,
+            'is_night_hours': 22 <= hour or hour <= 6
         }
     
     def _extract_sequence_features(self, events: List[Dict]) -> Dict:
@@ -124,16 +224,11 @@ class PatternFeatureExtractor:
     def _extract_contextual_features(self, events: List[Dict]) -> Dict:
         """Extract contextual features from event metadata."""
         # Count specific event types
-        event_type_counts = defaultdict(int)
-        for event in events:
-            event_type_counts[event.get('type', 'unknown')] += 1
+        event_type_counts = Counter(event.get('type', 'unknown') for event in events)
         
         return {
-            'navigation_count': event_type_counts.get('NAVIGATION', 0),
-            'click_count': event_type_counts.get('CLICK', 0),
-            'scroll_count': event_type_counts.get('SCROLL', 0),
-            'typing_count': event_type_counts.get('TYPING_PATTERN', 0),
-            'idle_count': event_type_counts.get('IDLE', 0)
+            feature_name: event_type_counts[event_type]
+            for feature_name, event_type in self.CONTEXTUAL_COUNT_FEATURES
         }
     
     def _empty_features(self) -> Dict:
@@ -153,8 +248,34 @@ class PatternFeatureExtractor:
 class CognitivePatternDetector:
     """Detects mental strain patterns from behavioral sequences."""
     
+    # Night degradation score and details indexed by hour of day (0-23)
+    _NIGHT_SCORE = (50, 50, 80, 80, 80, 50, 50) + (0,) * 15 + (50, 50)
+    _NIGHT_DETAILS = tuple(
+        'Peak night degradation period' if score == 80
+        else 'Night hours - reduced cognitive capacity' if score == 50
+        else 'Normal hours'
+        for score in _NIGHT_SCORE
+    )
+    
+    # Event-based detectors as (pattern name, method, minimum events, details
+    # reported when there are too few events for the detector to run)
+    _EVENT_DETECTORS = (
+        ('task_switching', '_detect_task_switching', 5, 'Insufficient data'),
+        ('error_clustering', '_detect_error_clustering', 3, 'No error clustering'),
+        ('procrastination_loops', '_detect_procrastination_loops', 3, 'Insufficient data'),
+        ('browsing_drift', '_detect_browsing_drift', 2, 'Insufficient navigation'),
+        ('avoidance_behavior', '_detect_avoidance_behavior', 2, 'Insufficient topic data'),
+        ('micro_breaks', '_detect_micro_break_patterns', 2, 'No break data')
+    )
+    
+    PATTERN_HISTORY_SIZE = 256  # Scores retained per pattern
+    
     def __init__(self):
-        self.pattern_history = defaultdict(list)
+        self.pattern_history = defaultdict(lambda: deque(maxlen=self.PATTERN_HISTORY_SIZE))
+    
+    def record(self, pattern_name: str, score: float):
+        """Append a pattern score to its bounded history, evicting the oldest."""
+        self.pattern_history[pattern_name].append(score)
         
     def detect_patterns(self, events: List[Dict], features: Dict) -> Dict:
         """
@@ -168,19 +289,47 @@ class CognitivePatternDetector:
             Dictionary of detected patterns with scores
         """
         patterns = {}
+        event_count = len(events)
+        
+        # Materialize timestamps and type information once for all detectors
+        context = self._build_context(events) if event_count >= 2 else None
+        
+        # Detect each pattern type, skipping detectors that need more events
+        for pattern_name, method_name, min_events, skipped_details in self._EVENT_DETECTORS:
+            if event_count < min_events:
+                patterns[pattern_name] = {'detected': False, 'score': 0, 'details': skipped_details}
+            else:
+                patterns[pattern_name] = getattr(self, method_name)(events, context)
         
-        # Detect each pattern type
-        patterns['task_switching'] = self._detect_task_switching(events)
-        patterns['error_clustering'] = self._detect_error_clustering(events)
-        patterns['procrastination_loops'] = self._detect_procrastination_loops(events)
-        patterns['browsing_drift'] = self._detect_browsing_drift(events)
-        patterns['avoidance_behavior'] = self._detect_avoidance_behavior(events)
-        patterns['micro_breaks'] = self._detect_micro_break_patterns(events)
         patterns['night_degradation'] = self._detect_night_degradation(events, features)
         
+        for pattern_name, pattern_data in patterns.items():
+            self.record(pattern_name, pattern_data['score'])
+        
         return patterns
     
-    def _detect_task_switching(self, events: List[Dict]) -> Dict:
+    def _build_context(self, events: List[Dict]) -> Dict:
+        """
+        Extract per-event values shared by the detectors in a single pass.
+        
+        Returns:
+            Dictionary with normalized event records, event timestamps,
+            byte-encoded types, type counts and navigation timestamps
+        """
+        records = [EventRecord.from_event(e) for e in events]
+        timestamps = [r.timestamp for r in records]
+        type_codes = bytes(EVENT_TYPE_CODES.get(r.type, UNKNOWN_EVENT_CODE) for r in records)
+        nav_code = EVENT_TYPE_CODES['NAVIGATION']
+        
+        return {
+            'records': records,
+            'timestamps': timestamps,
+            'type_codes': type_codes,
+            'type_counts': Counter(r.type for r in records),
+            'nav_timestamps': [ts for ts, code in zip(timestamps, type_codes) if code == nav_code]
+        }
+    
+    def _detect_task_switching(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Detect rapid context switching indicating cognitive overload.
         Threshold: >5 switches in 2 minutes
@@ -188,22 +337,17 @@ class CognitivePatternDetector:
         if len(events) < 5:
             return {'detected': False, 'score': 0, 'details': 'Insufficient data'}
         
+        if context is None:
+            context = self._build_context(events)
+        
         # Look for navigation events within 2-minute windows
-        nav_events = [e for e in events if e.get('type') == 'NAVIGATION']
+        nav_timestamps = context['nav_timestamps']
         
-        if len(nav_events) < 5:
+        if len(nav_timestamps) < 5:
             return {'detected': False, 'score': 0, 'details': 'No rapid switching'}
         
-        # Check for switches in 2-minute windows
-        rapid_switches = 0
-        window_size = 120000  # 2 minutes in milliseconds
-        
-        for i in range(len(nav_events) - 4):
-            window_start = nav_events[i].get('timestamp', 0)
-            window_end = nav_events[i + 4].get('timestamp', 0)
-            
-            if window_end - window_start <= window_size:
-                rapid_switches += 1
+        # Check for 5 switches within 2-minute windows
+        rapid_switches = count_windows(nav_timestamps, 5, 120000)
         
         detected = rapid_switches > 0
         score = min(rapid_switches * 15, 100)  # Scale score
@@ -215,28 +359,22 @@ class CognitivePatternDetector:
             'switch_count': rapid_switches
         }
     
-    def _detect_error_clustering(self, events: List[Dict]) -> Dict:
+    def _detect_error_clustering(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Detect error bursts suggesting mental fatigue.
         Threshold: 3+ errors within 5 minutes
         """
-        error_events = [e for e in events if 
-                       e.get('type') == 'ERROR' or 
-                       e.get('metadata', {}).get('hasError', False)]
+        if context is None:
+            context = self._build_context(events)
         
-        if len(error_events) < 3:
-            return {'detected': False, 'score': 0, 'details': 'No error clustering'}
+        error_timestamps = [r.timestamp for r in context['records'] if
+                            r.type == 'ERROR' or r.metadata.get('hasError', False)]
         
-        # Check for error clusters in 5-minute windows
-        clusters = 0
-        window_size = 300000  # 5 minutes in milliseconds
+        if len(error_timestamps) < 3:
+            return {'detected': False, 'score': 0, 'details': 'No error clustering'}
         
-        for i in range(len(error_events) - 2):
-            window_start = error_events[i].get('timestamp', 0)
-            window_end = error_events[i + 2].get('timestamp', 0)
-            
-            if window_end - window_start <= window_size:
-                clusters += 1
+        # Check for 3 errors within 5-minute windows
+        clusters = count_windows(error_timestamps, 3, 300000)
         
         detected = clusters > 0
         score = min(clusters * 20, 100)
@@ -246,10 +384,10 @@ class CognitivePatternDetector:
             'score': score,
             'details': f'Detected {clusters} error clusters',
             'cluster_count': clusters,
-            'total_errors': len(error_events)
+            'total_errors': len(error_timestamps)
         }
     
-    def _detect_procrastination_loops(self, events: List[Dict]) -> Dict:
+    def _detect_procrastination_loops(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Recognize repeated idle-navigation-idle cycles.
         """
@@ -257,13 +395,8 @@ class CognitivePatternDetector:
             return {'detected': False, 'score': 0, 'details': 'Insufficient data'}
         
         # Look for idle -> navigation -> idle patterns
-        loop_count = 0
-        
-        for i in range(len(events) - 2):
-            if (events[i].get('type') == 'IDLE' and
-                events[i + 1].get('type') == 'NAVIGATION' and
-                events[i + 2].get('type') == 'IDLE'):
-                loop_count += 1
+        type_codes = context['type_codes'] if context is not None else encode_event_types(events)
+        loop_count = sum(1 for _ in _PROCRASTINATION_LOOP_PATTERN.finditer(type_codes))
         
         detected = loop_count >= 2
         score = min(loop_count * 15, 100)
@@ -275,21 +408,24 @@ class CognitivePatternDetector:
             'loop_count': loop_count
         }
     
-    def _detect_browsing_drift(self, events: List[Dict]) -> Dict:
+    def _detect_browsing_drift(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Track navigation away from learning content with quick returns.
         """
-        nav_events = [e for e in events if e.get('type') == 'NAVIGATION']
+        if context is None:
+            context = self._build_context(events)
+        
+        nav_timestamps = context['nav_timestamps']
         
-        if len(nav_events) < 2:
+        if len(nav_timestamps) < 2:
             return {'detected': False, 'score': 0, 'details': 'Insufficient navigation'}
         
         # Look for quick back-and-forth navigation
         drift_count = 0
         quick_return_threshold = 30000  # 30 seconds
         
-        for i in range(len(nav_events) - 1):
-            time_diff = nav_events[i + 1].get('timestamp', 0) - nav_events[i].get('timestamp', 0)
+        for i in range(len(nav_timestamps) - 1):
+            time_diff = nav_timestamps[i + 1] - nav_timestamps[i]
             
             if time_diff < quick_return_threshold:
                 drift_count += 1
@@ -304,28 +440,31 @@ class CognitivePatternDetector:
             'drift_count': drift_count
         }
     
-    def _detect_avoidance_behavior(self, events: List[Dict]) -> Dict:
+    def _detect_avoidance_behavior(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Identify topics with consistently low engagement time.
         Threshold: <30% of average time
         """
-        # Group events by module/topic
+        if context is None:
+            context = self._build_context(events)
+        
+        # Group events by module/topic, keeping a running total across topics
         topic_times = defaultdict(float)
+        total_time = 0.0
         
-        for event in events:
-            metadata = event.get('metadata', {})
+        for record in context['records']:
+            metadata = record.metadata
             topic = metadata.get('moduleId') or metadata.get('topicId')
-            duration = event.get('duration', 0)
             
             if topic:
-                topic_times[topic] += duration
+                topic_times[topic] += record.duration
+                total_time += record.duration
         
         if len(topic_times) < 2:
             return {'detected': False, 'score': 0, 'details': 'Insufficient topic data'}
         
-        # Calculate average time per topic
-        avg_time = statistics.mean(topic_times.values())
-        threshold = avg_time * 0.3
+        # Threshold is 30% of the average time per topic
+        threshold = total_time * 0.3 / len(topic_times)
         
         # Find avoided topics
         avoided_topics = [topic for topic, time in topic_times.items() if time < threshold]
@@ -341,28 +480,30 @@ class CognitivePatternDetector:
             'total_topics': len(topic_times)
         }
     
-    def _detect_micro_break_patterns(self, events: List[Dict]) -> Dict:
+    def _detect_micro_break_patterns(self, events: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Analyze break frequency and duration.
         Optimal: 5-10 min breaks every 25-50 min
         """
-        idle_events = [e for e in events if e.get('type') == 'IDLE']
+        if context is None:
+            context = self._build_context(events)
         
-        if len(idle_events) < 2:
+        if context['type_counts']['IDLE'] < 2:
             return {'detected': False, 'score': 0, 'details': 'No break data'}
         
+        idle_events = [r for r in context['records'] if r.type == 'IDLE']
+        
         # Analyze break durations
         break_durations = []
         break_intervals = []
         
         for i, event in enumerate(idle_events):
-            duration = event.get('duration', 0) / 1000  # Convert to seconds
+            duration = event.duration / 1000  # Convert to seconds
             if duration >= 60:  # At least 1 minute idle counts as break
                 break_durations.append(duration / 60)  # Convert to minutes
                 
                 if i > 0:
-                    interval = (event.get('timestamp', 0) - 
-                               idle_events[i-1].get('timestamp', 0)) / 60000  # Minutes
+                    interval = (event.timestamp - idle_events[i-1].timestamp) / 60000  # Minutes
                     break_intervals.append(interval)
         
         if not break_durations:
@@ -408,19 +549,10 @@ class CognitivePatternDetector:
         if not is_night:
             return {'detected': False, 'score': 0, 'details': 'Daytime session'}
         
-        # During night hours, apply degradation factor
+        # During night hours, apply degradation factor (peak at 2-4 AM)
         hour = features.get('hour_of_day', 0)
-        
-        # Peak degradation at 2-4 AM
-        if 2 <= hour <= 4:
-            score = 80
-            details = 'Peak night degradation period'
-        elif 22 <= hour or hour <= 6:
-            score = 50
-            details = 'Night hours - reduced cognitive capacity'
-        else:
-            score = 0
-            details = 'Normal hours'
+        score = self._NIGHT_SCORE[hour]
+        details = self._NIGHT_DETAILS[hour]
         
         return {
             'detected': score > 0,
@@ -440,8 +572,17 @@ class MentalStrainClassifier:
         'critical': (75, 100)
     }
     
+    # Decay lookup table covers 0-240 minutes at 0.1-minute resolution
+    DECAY_LUT_MAX_MINUTES = 240
+    DECAY_LUT_RESOLUTION = 10  # steps per minute
+    
     def __init__(self):
         self.decay_half_life = 15  # minutes
+        decay_rate = math.log(2) / self.decay_half_life
+        self._decay_lut = [
+            math.exp(-decay_rate * step / self.DECAY_LUT_RESOLUTION)
+            for step in range(self.DECAY_LUT_MAX_MINUTES * self.DECAY_LUT_RESOLUTION + 1)
+        ]
         
     def classify(self, pattern_scores: Dict) -> Dict:
         """
@@ -491,8 +632,15 @@ class MentalStrainClassifier:
         """
         Apply exponential decay to older pattern scores.
         Half-life: 15 minutes
+        
+        Uses the precomputed lookup table for elapsed times within range and
+        falls back to computing the factor directly outside of it.
         """
-        decay_factor = math.exp(-0.693 * minutes_elapsed / self.decay_half_life)
+        idx = int(minutes_elapsed * self.DECAY_LUT_RESOLUTION)
+        if 0 <= idx < len(self._decay_lut):
+            return score * self._decay_lut[idx]
+        
+        decay_factor = math.exp(-math.log(2) * minutes_elapsed / self.decay_half_life)
         return score * decay_factor
 
 
@@ -517,19 +665,33 @@ class HistoricalBaselineTracker:
         if not historical_data:
             return self._default_baseline()
         
-        # Extract metrics
-        cognitive_loads = [d.get('cognitive_load_score', 0) for d in historical_data]
-        task_switches = [d.get('task_switching_count', 0) for d in historical_data]
-        error_rates = [d.get('error_rate', 0) for d in historical_data]
-        productivity_scores = [d.get('productivity_score', 0) for d in historical_data]
+        # Accumulate all metrics in a single pass over the history
+        n = len(historical_data)
+        sum_load = sum_load_sq = 0.0
+        sum_switches = sum_errors = sum_productivity = 0.0
+        
+        for d in historical_data:
+            load = d.get('cognitive_load_score', 0)
+            sum_load += load
+            sum_load_sq += load * load
+            sum_switches += d.get('task_switching_count', 0)
+            sum_errors += d.get('error_rate', 0)
+            sum_productivity += d.get('productivity_score', 0)
+        
+        avg_load = sum_load / n
+        if n > 1:
+            variance = (sum_load_sq - sum_load * avg_load) / (n - 1)
+            std_load = math.sqrt(max(variance, 0.0))
+        else:
+            std_load = 0
         
         baseline = {
-            'avg_cognitive_load': statistics.mean(cognitive_loads) if cognitive_loads else 0,
-            'std_cognitive_load': statistics.stdev(cognitive_loads) if len(cognitive_loads) > 1 else 0,
-            'avg_task_switching': statistics.mean(task_switches) if task_switches else 0,
-            'avg_error_rate': statistics.mean(error_rates) if error_rates else 0,
-            'avg_productivity': statistics.mean(productivity_scores) if productivity_scores else 0,
-            'data_points': len(historical_data),
+            'avg_cognitive_load': avg_load,
+            'std_cognitive_load': std_load,
+            'avg_task_switching': sum_switches / n,
+            'avg_error_rate': sum_errors / n,
+            'avg_productivity': sum_productivity / n,
+            'data_points': n,
             'calculated_at': datetime.now().isoformat()
         }
         
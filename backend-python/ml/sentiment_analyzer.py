@@ -7,17 +7,129 @@ This module provides sentiment analysis capabilities for mood tracking from:
 - Temporal mood trends
 """
 
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
-import statistics
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from array import array
+from bisect import bisect_left
+import asyncio
+import re
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import SystemMessage, HumanMessage
 import json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+# Kept byte-identical across calls so the provider can reuse the cached prefix
+MOOD_SYSTEM_PROMPT = """You are an expert at analyzing student emotional states from their text.
+Analyze the emotional tone considering: frustration, confidence, confusion, and engagement.
+Return ONLY a valid JSON object with this exact structure (no markdown, no explanation):
+{
+    "mood_score": <float between -1 and 1>,
+    "dominant_emotion": "<emotion name>",
+    "confidence": <float between 0 and 1>,
+    "explanation": "<brief explanation>"
+}"""
+
+# Happiness of common affect words on the labMT 1-9 scale (5 = neutral) and
+# the emotion each one signals. Short texts built from these words are
+# scored locally instead of being sent to the LLM.
+MOOD_LEXICON = {
+    'love': (8.4, 'excited'), 'fun': (8.0, 'excited'), 'amazing': (7.8, 'excited'),
+    'awesome': (7.6, 'excited'), 'excited': (8.1, 'excited'), 'yay': (7.6, 'excited'),
+    'happy': (8.3, 'excited'), 'great': (7.9, 'engaged'), 'excellent': (8.0, 'engaged'),
+    'enjoy': (7.7, 'engaged'), 'enjoyed': (7.7, 'engaged'), 'interesting': (7.2, 'engaged'),
+    'cool': (7.0, 'engaged'), 'nice': (7.4, 'engaged'), 'good': (7.2, 'engaged'),
+    'thanks': (7.4, 'engaged'), 'easy': (7.1, 'confident'), 'perfect': (7.6, 'confident'),
+    'solved': (7.0, 'confident'), 'clear': (6.8, 'confident'), 'confident': (7.2, 'confident'),
+    'hate': (2.3, 'frustrated'), 'frustrated': (2.6, 'frustrated'), 'frustrating': (2.7, 'frustrated'),
+    'annoying': (2.9, 'frustrated'), 'ugh': (3.0, 'frustrated'), 'stupid': (2.3, 'frustrated'),
+    'terrible': (2.0, 'frustrated'), 'awful': (2.0, 'frustrated'), 'bad': (2.6, 'frustrated'),
+    'fail': (2.6, 'frustrated'), 'failed': (2.4, 'frustrated'), 'wrong': (3.1, 'frustrated'),
+    'confused': (3.2, 'confused'), 'confusing': (3.1, 'confused'), 'lost': (2.8, 'confused'),
+    'stuck': (3.4, 'confused'), 'difficult': (3.5, 'confused'), 'impossible': (3.3, 'confused'),
+    'bored': (2.9, 'bored'), 'boring': (2.9, 'bored'), 'tired': (3.3, 'fatigued'),
+    'exhausted': (3.0, 'fatigued'), 'sad': (2.4, 'discouraged'), 'worried': (3.0, 'anxious'),
+    'anxious': (3.4, 'anxious'), 'stressed': (2.9, 'anxious'), 'overwhelmed': (3.1, 'overwhelmed'),
+}
+
+# Function words that carry no sentiment and are ignored when scoring
+_LEXICON_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'i', 'im', 'me', 'my', 'we', 'you', 'it', 'its', 'this', 'that',
+    'is', 'am', 'are', 'was', 'be', 'so', 'very', 'really', 'too', 'just', 'and', 'but',
+    'of', 'to', 'in', 'on', 'at', 'for', 'with', 'all', 'now', 'again', 'feel', 'feeling',
+})
+
+# Texts containing these are left to the LLM since lexicon scores ignore negation
+_LEXICON_NEGATORS = frozenset({
+    'not', 'no', 'never', 'nothing', 'hardly', 'dont', 'cant', 'isnt', 'wasnt',
+    'wont', 'didnt', 'doesnt', 'arent', 'aint', 'without',
+})
+
+
+def _ols_slope(y_values: List[float]) -> tuple:
+    """
+    Least-squares slope of y against its index in a single pass.
+    
+    With x = 0..n-1 the x sums have closed forms, so only sum(y) and
+    sum(x*y) need to be accumulated.
+    
+    Returns:
+        Tuple of (y_mean, slope)
+    """
+    sum_y = 0.0
+    sum_xy = 0.0
+    for x, y in enumerate(y_values):
+        sum_y += y
+        sum_xy += x * y
+    
+    return _slope_from_sums(len(y_values), sum_y, sum_xy)
+
+
+def _slope_from_sums(n: int, sum_y: float, sum_xy: float) -> tuple:
+    """
+    Closed-form least-squares slope from accumulated sum(y) and sum(x*y).
+    
+    Returns:
+        Tuple of (y_mean, slope)
+    """
+    y_mean = sum_y / n
+    x_mean = (n - 1) / 2
+    # sum((x - x_mean)^2) for x = 0..n-1
+    denominator = n * (n * n - 1) / 12
+    
+    if denominator == 0:
+        return y_mean, 0.0
+    return y_mean, (sum_xy - n * x_mean * y_mean) / denominator
+
 
 class MoodAnalyzer:
     """Analyzes mood from text inputs using LLM-based sentiment analysis."""
     
+    RESPONSE_CACHE_SIZE = 2048  # Cached LLM results kept in memory
+    BATCH_MAX_CONCURRENCY = 8  # Concurrent LLM requests per batch
+    
+    # Lexicon pre-scoring: longest text, share of words found in the lexicon,
+    # and distance from neutral (labMT scale) needed to skip the LLM
+    LEXICON_MAX_TOKENS = 6
+    LEXICON_MIN_COVERAGE = 0.3
+    LEXICON_MIN_DEVIATION = 0.8
+    LEXICON_MAX_CONFIDENCE = 0.8
+    
+    # Characters ignored when matching texts against cached results
+    _CACHE_KEY_STRIP = re.compile(r'[^\w\s]')
+    _CACHE_KEY_SPACE = re.compile(r'\s+')
+    
     def __init__(self, llm: ChatGoogleGenerativeAI):
         """
         Initialize mood analyzer with LLM.
@@ -26,18 +138,68 @@ class MoodAnalyzer:
             llm: Google Generative AI LLM instance
         """
         self.llm = llm
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert at analyzing student emotional states from their text.
-Analyze the emotional tone considering: frustration, confidence, confusion, and engagement.
-Return ONLY a valid JSON object with this exact structure (no markdown, no explanation):
-{
-    "mood_score": <float between -1 and 1>,
-    "dominant_emotion": "<emotion name>",
-    "confidence": <float between 0 and 1>,
-    "explanation": "<brief explanation>"
-}"""),
-            ("human", "Analyze this student's text: {text}")
-        ])
+        self._system_message = SystemMessage(content=MOOD_SYSTEM_PROMPT)
+        self._response_cache = OrderedDict()
+    
+    def _build_messages(self, text: str) -> List:
+        """Pair the shared system message with the text to analyze."""
+        return [self._system_message, HumanMessage(content=f"Analyze this student's text: {text}")]
+    
+    def _cache_key(self, text: str) -> str:
+        """Normalize text so casing, punctuation and spacing variants share a cache entry."""
+        key = self._CACHE_KEY_STRIP.sub('', text.lower())
+        return self._CACHE_KEY_SPACE.sub(' ', key).strip()
+    
+    def _get_cached_result(self, key: str) -> Optional[Dict]:
+        """Return a copy of a cached result, marking it as recently used."""
+        result = self._response_cache.get(key)
+        if result is None:
+            return None
+        self._response_cache.move_to_end(key)
+        return dict(result)
+    
+    def _cache_result(self, key: str, result: Dict):
+        """Store an LLM result, evicting the least recently used entry when full."""
+        self._response_cache[key] = dict(result)
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _lexicon_score(self, cache_key: str) -> Optional[Dict]:
+        """
+        Score short, clearly polarized texts from MOOD_LEXICON.
+        
+        Args:
+            cache_key: Normalized text from _cache_key
+            
+        Returns:
+            Mood analysis result, or None when the LLM should decide
+        """
+        tokens = cache_key.split()
+        if len(tokens) > self.LEXICON_MAX_TOKENS or not _LEXICON_NEGATORS.isdisjoint(tokens):
+            return None
+        
+        tokens = [token for token in tokens if token not in _LEXICON_STOPWORDS]
+        if not tokens:
+            return None
+        
+        hits = [MOOD_LEXICON[token] for token in tokens if token in MOOD_LEXICON]
+        coverage = len(hits) / len(tokens)
+        if coverage < self.LEXICON_MIN_COVERAGE:
+            return None
+        
+        happiness = sum(score for score, _ in hits) / len(hits)
+        if abs(happiness - 5.0) <= self.LEXICON_MIN_DEVIATION:
+            return None
+        
+        # The most polarized word names the emotion
+        emotion = max(hits, key=lambda hit: abs(hit[0] - 5.0))[1]
+        return {
+            'mood_score': max(-1.0, min(1.0, (happiness - 5.0) / 4.0)),
+            'dominant_emotion': emotion,
+            'confidence': min(coverage, self.LEXICON_MAX_CONFIDENCE),
+            'explanation': "Scored from mood lexicon"
+        }
     
     def analyze_text(self, text: str, context: str = "") -> Dict:
         """
@@ -53,12 +215,60 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no expla
         if not text or not text.strip():
             return self._neutral_mood("Empty text")
         
+        cache_key = self._cache_key(text)
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        lexicon_result = self._lexicon_score(cache_key)
+        if lexicon_result is not None:
+            return lexicon_result
+        
         try:
             # Create prompt
-            messages = self.prompt_template.format_messages(text=text)
+            messages = self._build_messages(text)
             
             # Get LLM response
             response = self.llm.invoke(messages)
+        except Exception as e:
+            return self._neutral_mood(f"Analysis error: {str(e)}")
+        
+        return self._process_response(response, cache_key)
+    
+    async def analyze_text_async(self, text: str, context: str = "") -> Dict:
+        """
+        Analyze mood from text input without blocking the event loop.
+        
+        Args:
+            text: Text to analyze
+            context: Optional context about where text came from
+            
+        Returns:
+            Dictionary with mood analysis results
+        """
+        if not text or not text.strip():
+            return self._neutral_mood("Empty text")
+        
+        cache_key = self._cache_key(text)
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        lexicon_result = self._lexicon_score(cache_key)
+        if lexicon_result is not None:
+            return lexicon_result
+        
+        try:
+            messages = self._build_messages(text)
+            response = await self.llm.ainvoke(messages)
+        except Exception as e:
+            return self._neutral_mood(f"Analysis error: {str(e)}")
+        
+        return self._process_response(response, cache_key)
+    
+    def _process_response(self, response, cache_key: str) -> Dict:
+        """Parse, validate and cache an LLM mood response."""
+        try:
             response_text = response.content.strip()
             
             # Remove markdown code blocks if present
@@ -67,7 +277,7 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no expla
                 response_text = "\n".join(lines[1:-1])
             
             # Parse JSON response
-            result = json.loads(response_text)
+            result = _json_loads(response_text)
             
             # Validate structure
             if not all(k in result for k in ['mood_score', 'dominant_emotion', 'confidence', 'explanation']):
@@ -77,6 +287,7 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no expla
             result['mood_score'] = max(-1.0, min(1.0, float(result['mood_score'])))
             result['confidence'] = max(0.0, min(1.0, float(result['confidence'])))
             
+            self._cache_result(cache_key, result)
             return result
             
         except json.JSONDecodeError:
@@ -88,18 +299,74 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no expla
         """
         Analyze mood for multiple texts efficiently.
         
+        Cached, empty and lexicon-scored texts are resolved locally; the remaining unique
+        texts are sent to the LLM concurrently in a single batch call.
+        
         Args:
             texts: List of text strings to analyze
             
         Returns:
             List of mood analysis results
         """
-        results = []
-        for text in texts:
-            result = self.analyze_text(text)
-            results.append(result)
+        results = [None] * len(texts)
+        pending = {}  # cache key -> (text, result indices)
+        
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = self._neutral_mood("Empty text")
+                continue
+            
+            cache_key = self._cache_key(text)
+            cached = self._get_cached_result(cache_key)
+            if cached is None:
+                cached = self._lexicon_score(cache_key)
+            if cached is not None:
+                results[i] = cached
+            elif cache_key in pending:
+                pending[cache_key][1].append(i)
+            else:
+                pending[cache_key] = (text, [i])
+        
+        if not pending:
+            return results
+        
+        try:
+            responses = self.llm.batch(
+                [self._build_messages(text) for text, _ in pending.values()],
+                config={'max_concurrency': self.BATCH_MAX_CONCURRENCY},
+                return_exceptions=True
+            )
+        except Exception as e:
+            responses = [e] * len(pending)
+        
+        for (cache_key, (_, indices)), response in zip(pending.items(), responses):
+            if isinstance(response, Exception):
+                result = self._neutral_mood(f"Analysis error: {str(response)}")
+            else:
+                result = self._process_response(response, cache_key)
+            for i in indices:
+                results[i] = dict(result)
+        
         return results
     
+    async def analyze_batch_async(self, texts: List[str]) -> List[Dict]:
+        """
+        Analyze mood for multiple texts concurrently from async code.
+        
+        Args:
+            texts: List of text strings to analyze
+            
+        Returns:
+            List of mood analysis results in input order
+        """
+        semaphore = asyncio.Semaphore(self.BATCH_MAX_CONCURRENCY)
+        
+        async def analyze(text: str) -> Dict:
+            async with semaphore:
+                return await self.analyze_text_async(text)
+        
+        return list(await asyncio.gather(*(analyze(text) for text in texts)))
+    
     def _neutral_mood(self, reason: str) -> Dict:
         """Return neutral mood result."""
         return {
@@ -113,10 +380,36 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no expla
 class TypingPatternMoodDetector:
     """Infers mood from typing behavior patterns."""
     
+    # (mood_score, emotion, confidence, explanation) for each typing class
+    # returned by _classify_typing, in rule priority order
+    TYPING_OUTCOMES = (
+        (-0.65, 'frustrated', 0.7, "High correction rate with slow typing suggests frustration"),
+        (0.65, 'confident', 0.8, "Consistent typing with few corrections indicates confidence"),
+        (-0.45, 'overwhelmed', 0.75, "Frequent pauses and corrections suggest cognitive overload"),
+        (0.5, 'engaged', 0.7, "Fast, accurate typing indicates high engagement"),
+        (-0.3, 'confused', 0.6, "Very slow typing may indicate confusion or fatigue"),
+        (0.0, 'neutral', 0.5, "Typing pattern within normal range")
+    )
+    
     def __init__(self):
         self.baseline_wpm = 40.0  # Average typing speed
         self.baseline_backspace_rate = 0.1  # 10% corrections
     
+    @property
+    def baseline_wpm(self) -> float:
+        """Baseline typing speed the WPM thresholds are derived from."""
+        return self._baseline_wpm
+    
+    @baseline_wpm.setter
+    def baseline_wpm(self, value: float):
+        self._baseline_wpm = value
+        # Precompute the WPM thresholds used by _classify_typing
+        self._wpm_very_slow = value * 0.5
+        self._wpm_slow = value * 0.7
+        self._wpm_steady_low = value * 0.9
+        self._wpm_steady_high = value * 1.3
+        self._wpm_fast = value * 1.4
+    
     def analyze_typing_pattern(self, typing_data: Dict) -> Dict:
         """
         Analyze mood from typing pattern data.
@@ -133,48 +426,10 @@ class TypingPatternMoodDetector:
         corrections = typing_data.get('corrections', 0)
         
         # Calculate mood indicators
-        mood_score = 0.0
-        confidence = 0.5
-        emotion = 'neutral'
-        explanation_parts = []
-        
-        # High backspace rate + low WPM → frustration/confusion
-        if backspace_rate > 0.2 and wpm < self.baseline_wpm * 0.7:
-            mood_score = -0.65
-            emotion = 'frustrated'
-            explanation_parts.append("High correction rate with slow typing suggests frustration")
-            confidence = 0.7
-        
-        # Consistent WPM + low corrections → confidence
-        elif backspace_rate < 0.08 and self.baseline_wpm * 0.9 <= wpm <= self.baseline_wpm * 1.3:
-            mood_score = 0.65
-            emotion = 'confident'
-            explanation_parts.append("Consistent typing with few corrections indicates confidence")
-            confidence = 0.8
-        
-        # Erratic typing with long pauses → cognitive overload
-        elif pauses > 10 and backspace_rate > 0.15:
-            mood_score = -0.45
-            emotion = 'overwhelmed'
-            explanation_parts.append("Frequent pauses and corrections suggest cognitive overload")
-            confidence = 0.75
-        
-        # Very fast typing → engagement
-        elif wpm > self.baseline_wpm * 1.4 and backspace_rate < 0.12:
-            mood_score = 0.5
-            emotion = 'engaged'
-            explanation_parts.append("Fast, accurate typing indicates high engagement")
-            confidence = 0.7
-        
-        # Very slow typing → confusion or fatigue
-        elif wpm < self.baseline_wpm * 0.5:
-            mood_score = -0.3
-            emotion = 'confused'
-            explanation_parts.append("Very slow typing may indicate confusion or fatigue")
-            confidence = 0.6
-        
-        else:
-            explanation_parts.append("Typing pattern within normal range")
+        mood_score, emotion, confidence, explanation = self.TYPING_OUTCOMES[
+            self._classify_typing(wpm, backspace_rate, pauses)
+        ]
+        explanation_parts = [explanation]
         
         # Calculate typing consistency score
         consistency_score = self._calculate_consistency(typing_data)
@@ -193,6 +448,37 @@ class TypingPatternMoodDetector:
             }
         }
     
+    def analyze_typing_patterns(self, typing_samples: List[Dict]) -> List[Dict]:
+        """
+        Analyze mood for multiple typing pattern samples.
+        
+        Args:
+            typing_samples: List of typing metric dictionaries
+            
+        Returns:
+            List of mood analysis results in input order
+        """
+        return [self.analyze_typing_pattern(sample) for sample in typing_samples]
+    
+    def _classify_typing(self, wpm: float, backspace_rate: float, pauses: int) -> int:
+        """Return the index into TYPING_OUTCOMES of the first matching typing rule."""
+        # High backspace rate + low WPM -> frustration
+        if backspace_rate > 0.2 and wpm < self._wpm_slow:
+            return 0
+        # Consistent WPM + low corrections -> confidence
+        if backspace_rate < 0.08 and self._wpm_steady_low <= wpm <= self._wpm_steady_high:
+            return 1
+        # Erratic typing with long pauses -> cognitive overload
+        if pauses > 10 and backspace_rate > 0.15:
+            return 2
+        # Very fast typing -> engagement
+        if wpm > self._wpm_fast and backspace_rate < 0.12:
+            return 3
+        # Very slow typing -> confusion or fatigue
+        if wpm < self._wpm_very_slow:
+            return 4
+        return 5
+    
     def _calculate_consistency(self, typing_data: Dict) -> float:
         """
         Calculate typing consistency score from WPM variance.
@@ -209,19 +495,127 @@ class TypingPatternMoodDetector:
         return consistency
 
 
+@dataclass
+class MoodHistory:
+    """Mood samples stored as parallel score and timestamp arrays, oldest first."""
+    scores: array = field(default_factory=lambda: array('d'))
+    timestamps: array = field(default_factory=lambda: array('q'))
+    
+    @classmethod
+    def from_samples(cls, samples: Iterable[Tuple[int, float]]) -> 'MoodHistory':
+        """
+        Build a history from (timestamp, mood_score) pairs in any order.
+        
+        Args:
+            samples: Iterable of (timestamp in milliseconds, mood score) pairs
+            
+        Returns:
+            MoodHistory sorted by timestamp
+        """
+        history = cls()
+        for timestamp, score in sorted(samples, key=lambda sample: sample[0]):
+            history.timestamps.append(int(timestamp))
+            history.scores.append(float(score))
+        return history
+    
+    def __len__(self) -> int:
+        return len(self.scores)
+    
+    def since(self, cutoff_time: int) -> 'MoodHistory':
+        """Return the samples recorded at or after cutoff_time (milliseconds)."""
+        start = bisect_left(self.timestamps, cutoff_time)
+        return MoodHistory(self.scores[start:], self.timestamps[start:])
+    
+    def to_list_of_dicts(self) -> List[Dict]:
+        """Return samples as mood_score/timestamp dicts for API consumers."""
+        return [
+            {'mood_score': score, 'timestamp': timestamp}
+            for score, timestamp in zip(self.scores, self.timestamps)
+        ]
+
+
+class MoodWindow:
+    """
+    Sliding time window of mood samples with running regression sums.
+    
+    Samples are indexed x = 0..n-1 like MoodHistory, so appending adds
+    n * score to sum(x*y) and evicting the oldest sample shifts every
+    remaining index down by one, i.e. subtracts the new sum(y). Both are
+    O(1), which keeps summaries independent of the window size.
+    """
+    
+    def __init__(self, span_ms: int):
+        self.span_ms = span_ms
+        self.samples: Deque[Tuple[int, float]] = deque()
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+    
+    def __len__(self) -> int:
+        return len(self.samples)
+    
+    def append(self, timestamp: int, score: float):
+        """Add a sample and evict the ones that fell out of the window."""
+        samples = self.samples
+        if samples and timestamp < samples[-1][0]:
+            # Late sample: reinsert in order and rebuild the sums
+            ordered = sorted([*samples, (timestamp, score)], key=lambda sample: sample[0])
+            samples.clear()
+            samples.extend(ordered)
+            self._rebuild_sums()
+        else:
+            self.sum_xy += len(samples) * score
+            self.sum_y += score
+            samples.append((timestamp, score))
+        self.evict(samples[-1][0] - self.span_ms)
+    
+    def evict(self, cutoff_time: int):
+        """Drop samples recorded before cutoff_time (milliseconds)."""
+        samples = self.samples
+        while samples and samples[0][0] < cutoff_time:
+            self.sum_y -= samples.popleft()[1]
+            self.sum_xy -= self.sum_y
+        if not samples:
+            self.sum_y = 0.0
+            self.sum_xy = 0.0
+    
+    def _rebuild_sums(self):
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        for x, (_, score) in enumerate(self.samples):
+            self.sum_y += score
+            self.sum_xy += x * score
+    
+    def slope(self) -> tuple:
+        """Return (y_mean, slope) of the samples currently in the window."""
+        return _slope_from_sums(len(self.samples), self.sum_y, self.sum_xy)
+
+
 class MoodTrendAnalyzer:
     """Analyzes temporal mood trends and detects significant changes."""
     
-    def __init__(self, redis_client=None):
+    MOOD_HISTORY_TTL_SECONDS = 7 * 24 * 60 * 60
+    # Students whose rolling windows are kept when running without Redis
+    MOOD_WINDOW_CACHE_SIZE = 1024
+    
+    def __init__(self, redis_client=None, redis_url: Optional[str] = None):
         """
         Initialize mood trend analyzer.
         
         Args:
             redis_client: Redis client for storing mood history
+            redis_url: Redis URL to use the shared client for when no
+                redis_client is given
         """
+        if redis_client is None and redis_url is not None:
+            from config.redis_client import get_sync_redis
+            redis_client = get_sync_redis(redis_url)
         self.redis_client = redis_client
         self.mood_drop_threshold = 0.4  # Trigger intervention if mood drops by 0.4
         self.trend_window_minutes = 30
+        # (30-minute, 15-minute) windows per student. Only used without Redis:
+        # with Redis other workers write the same keys, so it stays the source
+        # of truth.
+        self._mood_windows: 'OrderedDict[str, Tuple[MoodWindow, MoodWindow]]' = OrderedDict()
     
     def store_mood_score(self, student_id: str, mood_score: float, timestamp: int = None):
         """
@@ -232,20 +626,43 @@ class MoodTrendAnalyzer:
             mood_score: Mood score (-1 to 1)
             timestamp: Unix timestamp in milliseconds (defaults to current time)
         """
-        if not self.redis_client:
-            return
-        
         if timestamp is None:
             timestamp = int(datetime.now().timestamp() * 1000)
         
-        # Store in Redis sorted set: mood:{student_id}
+        if not self.redis_client:
+            self._update_mood_windows(student_id, mood_score, timestamp)
+            return
+        
+        # Store in Redis sorted set mood:{student_id} scored by timestamp. The
+        # member includes the timestamp so equal mood scores don't overwrite
+        # each other.
         key = f"mood:{student_id}"
-        self.redis_client.zadd(key, {str(mood_score): timestamp})
+        retention_cutoff = timestamp - self.MOOD_HISTORY_TTL_SECONDS * 1000
+        
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(key, {f"{timestamp}:{mood_score}": timestamp})
+        pipe.zremrangebyscore(key, '-inf', f"({retention_cutoff}")
+        pipe.expire(key, self.MOOD_HISTORY_TTL_SECONDS)
+        pipe.execute()
+    
+    def _update_mood_windows(self, student_id: str, mood_score: float, timestamp: int):
+        """Append a sample to the student's in-process rolling windows."""
+        windows = self._mood_windows.get(student_id)
+        if windows is None:
+            windows = (
+                MoodWindow(self.trend_window_minutes * 60 * 1000),
+                MoodWindow(15 * 60 * 1000)
+            )
+            self._mood_windows[student_id] = windows
+            if len(self._mood_windows) > self.MOOD_WINDOW_CACHE_SIZE:
+                self._mood_windows.popitem(last=False)
+        else:
+            self._mood_windows.move_to_end(student_id)
         
-        # Set TTL of 7 days
-        self.redis_client.expire(key, 7 * 24 * 60 * 60)
+        for window in windows:
+            window.append(timestamp, mood_score)
     
-    def get_mood_history(self, student_id: str, minutes: int = 30) -> List[Dict]:
+    def get_mood_history(self, student_id: str, minutes: int = 30) -> MoodHistory:
         """
         Get mood history for specified time window.
         
@@ -254,10 +671,10 @@ class MoodTrendAnalyzer:
             minutes: Time window in minutes
             
         Returns:
-            List of mood scores with timestamps
+            MoodHistory with scores and timestamps ordered oldest first
         """
         if not self.redis_client:
-            return []
+            return MoodHistory()
         
         key = f"mood:{student_id}"
         cutoff_time = int((datetime.now() - timedelta(minutes=minutes)).timestamp() * 1000)
@@ -265,14 +682,17 @@ class MoodTrendAnalyzer:
         # Get scores from Redis
         results = self.redis_client.zrangebyscore(key, cutoff_time, '+inf', withscores=True)
         
-        mood_history = []
-        for score_str, timestamp in results:
-            mood_history.append({
-                'mood_score': float(score_str),
-                'timestamp': int(timestamp)
-            })
-        
-        return sorted(mood_history, key=lambda x: x['timestamp'])
+        return MoodHistory.from_samples(
+            (timestamp, self._parse_mood_member(member)) for member, timestamp in results
+        )
+    
+    @staticmethod
+    def _parse_mood_member(member) -> float:
+        """Extract the mood score from a '{timestamp}:{score}' sorted-set member."""
+        if isinstance(member, bytes):
+            member = member.decode('utf-8')
+        # Members written before timestamps were included hold only the score
+        return float(member.rpartition(':')[2])
     
     def calculate_mood_trend(self, student_id: str, window_minutes: int = 30) -> Dict:
         """
@@ -286,7 +706,10 @@ class MoodTrendAnalyzer:
             Trend analysis with slope and direction
         """
         mood_history = self.get_mood_history(student_id, window_minutes)
-        
+        return self._calculate_mood_trend_from_history(mood_history)
+    
+    def _calculate_mood_trend_from_history(self, mood_history: MoodHistory) -> Dict:
+        """Calculate the mood trend from already fetched, time-ordered history."""
         if len(mood_history) < 2:
             return {
                 'trend': 'stable',
@@ -297,29 +720,10 @@ class MoodTrendAnalyzer:
         
         # Calculate linear regression slope
         n = len(mood_history)
-        x_values = list(range(n))
-        y_values = [entry['mood_score'] for entry in mood_history]
-        
-        # Calculate means
-        x_mean = statistics.mean(x_values)
-        y_mean = statistics.mean(y_values)
+        y_values = mood_history.scores
+        y_mean, slope = _ols_slope(y_values)
         
-        # Calculate slope
-        numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(x_values, y_values))
-        denominator = sum((x - x_mean) ** 2 for x in x_values)
-        
-        if denominator == 0:
-            slope = 0.0
-        else:
-            slope = numerator / denominator
-        
-        # Determine trend direction
-        if slope > 0.01:
-            trend = 'improving'
-        elif slope < -0.01:
-            trend = 'declining'
-        else:
-            trend = 'stable'
+        trend = self._trend_direction(slope)
         
         # Calculate confidence based on data points
         confidence = min(1.0, n / 10.0)  # Full confidence at 10+ data points
@@ -333,6 +737,15 @@ class MoodTrendAnalyzer:
             'avg_mood': y_mean
         }
     
+    @staticmethod
+    def _trend_direction(slope: float) -> str:
+        """Map a regression slope onto a trend label."""
+        if slope > 0.01:
+            return 'improving'
+        if slope < -0.01:
+            return 'declining'
+        return 'stable'
+    
     def detect_mood_drop(self, student_id: str, minutes: int = 15) -> Dict:
         """
         Detect significant mood drops that require intervention.
@@ -345,7 +758,10 @@ class MoodTrendAnalyzer:
             Detection result with intervention flag
         """
         mood_history = self.get_mood_history(student_id, minutes)
-        
+        return self._detect_mood_drop_from_history(mood_history, minutes)
+    
+    def _detect_mood_drop_from_history(self, mood_history: MoodHistory, minutes: int) -> Dict:
+        """Detect a mood drop in already fetched, time-ordered history."""
         if len(mood_history) < 2:
             return {
                 'drop_detected': False,
@@ -354,8 +770,8 @@ class MoodTrendAnalyzer:
             }
         
         # Compare first and last mood scores
-        initial_mood = mood_history[0]['mood_score']
-        current_mood = mood_history[-1]['mood_score']
+        initial_mood = mood_history.scores[0]
+        current_mood = mood_history.scores[-1]
         drop_magnitude = initial_mood - current_mood
         
         drop_detected = drop_magnitude >= self.mood_drop_threshold
@@ -380,6 +796,9 @@ class MoodTrendAnalyzer:
         Returns:
             Summary with current mood, trends, and alerts
         """
+        if not self.redis_client and student_id in self._mood_windows:
+            return self._mood_summary_from_windows(student_id)
+        
         # Get recent history
         history_30min = self.get_mood_history(student_id, 30)
         
@@ -392,16 +811,18 @@ class MoodTrendAnalyzer:
             }
         
         # Current mood
-        current_mood = history_30min[-1]['mood_score']
+        current_mood = history_30min.scores[-1]
         
         # Average mood
-        avg_mood = statistics.mean([entry['mood_score'] for entry in history_30min])
+        avg_mood = sum(history_30min.scores) / len(history_30min)
         
         # Trend
-        trend_data = self.calculate_mood_trend(student_id, 30)
+        trend_data = self._calculate_mood_trend_from_history(history_30min)
         
-        # Drop detection
-        drop_data = self.detect_mood_drop(student_id, 15)
+        # Drop detection over the most recent 15 minutes of the same history
+        cutoff_15min = int((datetime.now() - timedelta(minutes=15)).timestamp() * 1000)
+        history_15min = history_30min.since(cutoff_15min)
+        drop_data = self._detect_mood_drop_from_history(history_15min, 15)
         
         return {
             'current_mood': current_mood,
@@ -412,3 +833,38 @@ class MoodTrendAnalyzer:
             'intervention_needed': drop_data['intervention_needed'],
             'data_points': len(history_30min)
         }
+    
+    def _mood_summary_from_windows(self, student_id: str) -> Dict:
+        """Build the mood summary from the running sums of the rolling windows."""
+        window_30min, window_15min = self._mood_windows[student_id]
+        now = datetime.now()
+        window_30min.evict(int((now - timedelta(minutes=30)).timestamp() * 1000))
+        window_15min.evict(int((now - timedelta(minutes=15)).timestamp() * 1000))
+        
+        n = len(window_30min)
+        if not n:
+            return {
+                'current_mood': 0.0,
+                'avg_mood_30min': 0.0,
+                'trend': 'unknown',
+                'mood_drop_alert': False
+            }
+        
+        avg_mood, slope = window_30min.slope()
+        if n < 2:
+            slope = 0.0
+        trend = self._trend_direction(slope)
+        
+        drop_magnitude = 0.0
+        if len(window_15min) >= 2:
+            drop_magnitude = window_15min.samples[0][1] - window_15min.samples[-1][1]
+        
+        return {
+            'current_mood': window_30min.samples[-1][1],
+            'avg_mood_30min': avg_mood,
+            'trend': trend,
+            'trend_slope': slope,
+            'mood_drop_alert': drop_magnitude >= self.mood_drop_threshold,
+            'intervention_needed': drop_magnitude >= 0.6,
+            'data_points': n
+        }
@@ -6,9 +6,40 @@ for mood analysis.
 """
 
 from typing import Dict, List, Optional
+from functools import lru_cache
 import json
 import re
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Compiled once at import; clean_text runs for every extracted text
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s.,!?-]')
+
+# Simple heuristics for code detection
+_CODE_INDICATORS = (
+    'function', 'const', 'let', 'var', 'class',
+    'def ', 'import ', 'from ', 'return ',
+    '{', '}', '=>', '===', '!=='
+)
+
+# Byte translation table flagging mathematical characters with 1 and all
+# others with 0. Text is ASCII-encoded with replacement so every character,
+# including non-ASCII ones, maps to exactly one byte.
+_MATH_CHARS = b'0123456789+-*/=()[]{}^'
+_MATH_FLAG_TABLE = bytes(1 if byte in _MATH_CHARS else 0 for byte in range(256))
+
+# Identical quiz answers and search queries recur across students, so the
+# pure preprocessing helpers memoize their results
+TEXT_CACHE_SIZE = 4096
+
 
 class TextProcessor:
     """Handles text extraction and preprocessing for sentiment analysis."""
@@ -28,7 +59,7 @@ class TextProcessor:
         
         if isinstance(answers, str):
             try:
-                answers = json.loads(answers)
+                answers = _json_loads(answers)
             except json.JSONDecodeError:
                 return answers
         
@@ -52,6 +83,24 @@ class TextProcessor:
         
         return ' '.join(text_parts)
     
+    @staticmethod
+    def extract_quiz_event_text(quiz_event: Dict) -> str:
+        """
+        Extract answer text from a quiz completion event.
+        
+        Args:
+            quiz_event: Quiz completion event with metadata
+            
+        Returns:
+            Concatenated answer text if a quiz result is present
+        """
+        metadata = quiz_event.get('metadata', {})
+        
+        if 'quizResult' not in metadata:
+            return ''
+        
+        return TextProcessor.extract_quiz_answer_text(metadata['quizResult'])
+    
     @staticmethod
     def extract_search_query_text(navigation_event: Dict) -> str:
         """
@@ -92,6 +141,7 @@ class TextProcessor:
         return str(text)
     
     @staticmethod
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
     def clean_text(text: str) -> str:
         """
         Clean and normalize text for sentiment analysis.
@@ -106,10 +156,10 @@ class TextProcessor:
             return ""
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,!?-]', '', text)
+        text = _SPECIAL_CHARS_RE.sub('', text)
         
         # Strip leading/trailing whitespace
         text = text.strip()
@@ -117,6 +167,7 @@ class TextProcessor:
         return text
     
     @staticmethod
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
     def is_code_snippet(text: str) -> bool:
         """
         Check if text appears to be a code snippet.
@@ -127,19 +178,19 @@ class TextProcessor:
         Returns:
             True if text looks like code
         """
-        # Simple heuristics for code detection
-        code_indicators = [
-            'function', 'const', 'let', 'var', 'class',
-            'def ', 'import ', 'from ', 'return ',
-            '{', '}', '=>', '===', '!=='
-        ]
-        
+        # Code needs at least two distinct indicators; stop once both are found
         text_lower = text.lower()
-        code_matches = sum(1 for indicator in code_indicators if indicator in text_lower)
-        
-        return code_matches >= 2
+        code_matches = 0
+        for indicator in _CODE_INDICATORS:
+            if indicator in text_lower:
+                code_matches += 1
+                if code_matches >= 2:
+                    return True
+        
+        return False
     
     @staticmethod
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
     def is_mathematical_notation(text: str) -> bool:
         """
         Check if text contains primarily mathematical notation.
@@ -150,12 +201,13 @@ class TextProcessor:
         Returns:
             True if text is mostly math notation
         """
-        math_chars = sum(1 for char in text if char in '0123456789+-*/=()[]{}^')
-        total_chars = len(text.replace(' ', ''))
+        flags = text.encode('ascii', 'replace').translate(_MATH_FLAG_TABLE, b' ')
+        total_chars = len(flags)
         
         if total_chars == 0:
             return False
         
+        math_chars = flags.count(1)
         return (math_chars / total_chars) > 0.5
     
     @staticmethod
@@ -170,30 +222,20 @@ class TextProcessor:
             List of extracted text strings
         """
         texts = []
+        append_text = texts.append
+        extractors = _EVENT_TEXT_EXTRACTORS
         
         for event in events:
-            event_type = event.get('type', '')
-            
-            if event_type == 'TYPING_PATTERN':
-                text = TextProcessor.extract_typing_text(event)
-                if text:
-                    texts.append(text)
-            
-            elif event_type == 'NAVIGATION':
-                text = TextProcessor.extract_search_query_text(event)
+            extractor = extractors.get(event.get('type', ''))
+            if extractor is not None:
+                text = extractor(event)
                 if text:
-                    texts.append(text)
-            
-            elif event_type == 'QUIZ_COMPLETE':
-                metadata = event.get('metadata', {})
-                if 'quizResult' in metadata:
-                    text = TextProcessor.extract_quiz_answer_text(metadata['quizResult'])
-                    if text:
-                        texts.append(text)
+                    append_text(text)
         
         return texts
     
     @staticmethod
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
     def preprocess_for_sentiment(text: str) -> Optional[str]:
         """
         Preprocess text for sentiment analysis.
@@ -262,3 +304,11 @@ class TextProcessor:
         
         # Truncate and add ellipsis
         return text[:max_length - 3] + '...'
+
+
+# Text extractor for each event type that carries free text
+_EVENT_TEXT_EXTRACTORS = {
+    'TYPING_PATTERN': TextProcessor.extract_typing_text,
+    'NAVIGATION': TextProcessor.extract_search_query_text,
+    'QUIZ_COMPLETE': TextProcessor.extract_quiz_event_text
+}
@@ -1,6 +1,23 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation, TypeAdapter
+from typing import Annotated, List, Dict, Any, Literal, Optional
 from enum import Enum
+from dataclasses import dataclass
+# pydantic only accepts typing_extensions.TypedDict before Python 3.12
+from typing_extensions import TypedDict
+
+
+# Lists in response payloads are built by server code and annotated
+# Annotated[List[...], SkipValidation]: the item type stays in the OpenAPI
+# schema but pydantic does not walk every element.
+
+class SchemaBase(BaseModel):
+    """Base for API schemas: core schemas are built on first use, not at import."""
+    model_config = ConfigDict(
+        defer_build=True,
+        extra='ignore',
+        validate_assignment=False,
+        revalidate_instances='never'
+    )
 
 
 class BehaviorEventType(str, Enum):
@@ -16,22 +33,50 @@ class BehaviorEventType(str, Enum):
     TIME_TRACKING = "TIME_TRACKING"
 
 
-class BehaviorEventSchema(BaseModel):
+# BehaviorEventType values as a Literal (keep in sync with the enum): validated
+# by plain string matching, without constructing an enum member per event
+BehaviorEventTypeName = Literal[
+    "TASK_SWITCH",
+    "TYPING_PATTERN",
+    "SCROLL_BEHAVIOR",
+    "MOUSE_MOVEMENT",
+    "FOCUS_CHANGE",
+    "NAVIGATION",
+    "IDLE_TIME",
+    "QUIZ_ERROR",
+    "CONTENT_INTERACTION",
+    "TIME_TRACKING",
+]
+
+
+class BehaviorEventSchema(SchemaBase):
+    # Hot ingest path: drop unknown fields and keep payload dicts unvalidated
+    model_config = ConfigDict(extra='ignore', frozen=True, str_max_length=65536)
+    
     id: str
     sessionId: str
     studentId: str
-    eventType: BehaviorEventType
-    eventData: Dict[str, Any]
+    eventType: BehaviorEventTypeName  # BehaviorEventType(eventType) for the enum
+    eventData: dict
     timestamp: int
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[dict] = None
+
+
+# Validator for event batches, built once at import
+BEHAVIOR_EVENT_LIST_ADAPTER = TypeAdapter(List[BehaviorEventSchema])
 
 
-class CognitiveLoadRequest(BaseModel):
-    student_id: str = Field(..., description="Student UUID")
-    session_id: str = Field(..., description="Session UUID")
+def parse_behavior_events(events: List[dict]) -> List[BehaviorEventSchema]:
+    """Validate a batch of raw behavioral events in a single pydantic-core call."""
+    return BEHAVIOR_EVENT_LIST_ADAPTER.validate_python(events)
 
 
-class CognitiveLoadResponse(BaseModel):
+class CognitiveLoadRequest(SchemaBase):
+    student_id: str  # Student UUID
+    session_id: str  # Session UUID
+
+
+class CognitiveLoadResponse(SchemaBase):
     student_id: str
     session_id: str
     cognitive_load_score: float = Field(..., ge=0, le=100)
@@ -47,109 +92,113 @@ class InterventionType(str, Enum):
     PACE_ADJUSTMENT = "pace_adjustment"
 
 
-class InterventionResponse(BaseModel):
+class InterventionResponse(SchemaBase):
     intervention_id: str
     student_id: str
     intervention_type: InterventionType
     message: str
-    priority: str = Field(..., description="low, medium, high, critical")
-    context: Dict[str, Any]
+    priority: str  # low, medium, high, critical
+    context: dict
     timestamp: int
 
 
-class CurriculumAdjustmentRequest(BaseModel):
+class CurriculumAdjustmentRequest(SchemaBase):
     student_id: str
     learning_path_id: str
     reason: str
-    context: Optional[Dict[str, Any]] = None
+    context: Optional[dict] = None
 
 
-class CurriculumAdjustmentResponse(BaseModel):
+class CurriculumAdjustmentResponse(SchemaBase):
     student_id: str
     learning_path_id: str
-    adjustments: List[Dict[str, Any]]
+    adjustments: Annotated[List[dict], SkipValidation]
     difficulty_change: Optional[str] = None
     estimated_duration_change: Optional[int] = None
 
 
-class AgentExecutionStatus(BaseModel):
+# Server-built containers are slotted dataclasses: no validation when handlers
+# create or update them, and FastAPI still serializes them via response_model.
+
+@dataclass(slots=True, kw_only=True)
+class AgentExecutionStatus:
     workflow_id: str
-    status: str = Field(..., description="running, completed, failed")
+    status: str  # running, completed, failed
     student_id: str
     session_id: str
-    agents_executed: List[str]
+    agents_executed: Annotated[List[str], SkipValidation]
     current_agent: Optional[str] = None
-    agent_outputs: Dict[str, Any]
-    errors: List[str]
+    agent_outputs: dict
+    errors: Annotated[List[str], SkipValidation]
     started_at: int
     completed_at: Optional[int] = None
 
 
-class TriggerWorkflowRequest(BaseModel):
+class TriggerWorkflowRequest(SchemaBase):
     student_id: str
     session_id: str
-    trigger_type: str = Field(..., description="session_end, quiz_completed, cognitive_threshold_breach, manual")
+    trigger_type: str  # session_end, quiz_completed, cognitive_threshold_breach, manual
 
 
-class TriggerWorkflowResponse(BaseModel):
+class TriggerWorkflowResponse(SchemaBase):
     workflow_id: str
     status: str
     message: str
 
 
-class RequestInterventionRequest(BaseModel):
+class RequestInterventionRequest(SchemaBase):
     student_id: str
     reason: str
-    context: Dict[str, Any]
+    context: dict
 
 
-class HealthCheckResponse(BaseModel):
+class HealthCheckResponse(SchemaBase):
     status: str
     timestamp: str
     services: Dict[str, str]
 
 
-class AgentHealthResponse(BaseModel):
+class AgentHealthResponse(SchemaBase):
     status: str
-    agents: Dict[str, Dict[str, Any]]
-    workflow_stats: Dict[str, Any]
+    agents: Dict[str, dict]
+    workflow_stats: dict
     pubsub_status: str
 
 
 # CLR-specific Pydantic schemas
 
-class CLRCurrentResponse(BaseModel):
+class CLRCurrentResponse(SchemaBase):
     """Current cognitive load data response"""
     student_id: str
     cognitive_load_score: float = Field(..., ge=0, le=100)
     mental_fatigue_level: str
-    detected_patterns: List[str]
-    mood_indicators: Dict[str, Any]
+    detected_patterns: Annotated[List[str], SkipValidation]
+    mood_indicators: dict
     timestamp: int
     session_id: str
 
 
-class CLRHistoryResponse(BaseModel):
+class CLRHistoryResponse(SchemaBase):
     """Cognitive load history response"""
     student_id: str
     time_range: str
     granularity: str
-    history: List[Dict[str, Any]]
+    history: Annotated[List[dict], SkipValidation]
     statistics: Dict[str, float]
     trend: str
     trend_slope: float
     data_points: int
 
 
-class CLRInsightsResponse(BaseModel):
+class CLRInsightsResponse(SchemaBase):
     """AI-generated insights response"""
     student_id: str
     insights: str
-    recommendations: List[str]
+    recommendations: Annotated[List[str], SkipValidation]
     generated_at: int
 
 
-class CLRPatternsResponse(BaseModel):
+class CLRPatternsResponse(SchemaBase):
     """Detected patterns analysis response"""
     student_id: str
     days_analyzed: int
@@ -158,7 +207,7 @@ class CLRPatternsResponse(BaseModel):
     total_pattern_detections: int
 
 
-class CLRBaselineResponse(BaseModel):
+class CLRBaselineResponse(SchemaBase):
     """Baseline metrics response"""
     student_id: str
     baseline_avg: float
@@ -166,19 +215,19 @@ class CLRBaselineResponse(BaseModel):
     baseline_range: Dict[str, float]
     current_score: Optional[float]
     deviation_from_baseline: Optional[float]
-    common_patterns: List[Any]
+    common_patterns: Annotated[List[Any], SkipValidation]
     data_points: int
     calculated_at: str
 
 
-class TextAnalysisRequest(BaseModel):
+class TextAnalysisRequest(SchemaBase):
     """Text mood analysis request"""
     student_id: str
     text: str
     context: str = ""
 
 
-class TextAnalysisResponse(BaseModel):
+class TextAnalysisResponse(SchemaBase):
     """Text mood analysis response"""
     student_id: str
     mood_score: float = Field(..., ge=-1, le=1)
@@ -187,7 +236,7 @@ class TextAnalysisResponse(BaseModel):
     explanation: str
 
 
-class CLRPredictionResponse(BaseModel):
+class CLRPredictionResponse(SchemaBase):
     """Cognitive load prediction response"""
     student_id: str
     predicted_load_15min: float
@@ -195,10 +244,14 @@ class CLRPredictionResponse(BaseModel):
     trend: str
     confidence: float
     early_intervention_needed: bool
-    recommendations: List[str] = []
+    recommendations: Annotated[List[str], SkipValidation] = []
+
 
+# Response-only payloads assembled from trusted server data are TypedDicts:
+# FastAPI validates them once against response_model instead of also
+# running model validation when the handler builds them.
 
-class CLRDashboardResponse(BaseModel):
+class CLRDashboardResponse(TypedDict):
     """Comprehensive dashboard response"""
     student_id: str
     current: CLRCurrentResponse
@@ -210,29 +263,29 @@ class CLRDashboardResponse(BaseModel):
     timestamp: int
 
 
-class PerformanceMetricsResponse(BaseModel):
+class PerformanceMetricsResponse(SchemaBase):
     """Performance metrics response"""
     student_id: str
     quiz_accuracy: float
     learning_velocity: float
     improvement_trend: str
     task_completion_rate: float
-    weak_topics: List[str]
+    weak_topics: Annotated[List[str], SkipValidation]
     performance_insights: str
     timestamp: int
 
 
-class ImprovementCurveResponse(BaseModel):
+class ImprovementCurveResponse(SchemaBase):
     """Improvement curve data for visualization"""
     student_id: str
-    data_points: List[Dict[str, Any]]
-    trend_line: List[float]
+    data_points: Annotated[List[dict], SkipValidation]
+    trend_line: Annotated[List[float], SkipValidation]
     velocity: float
     plateau_detected: bool
     confidence: float
 
 
-class EngagementMetricsResponse(BaseModel):
+class EngagementMetricsResponse(SchemaBase):
     """Engagement metrics response"""
     student_id: str
     engagement_score: float
@@ -241,23 +294,23 @@ class EngagementMetricsResponse(BaseModel):
     dropout_risk: float
     return_frequency: Dict[str, int]
     engagement_insights: str
-    dropout_signals: List[str]
+    dropout_signals: Annotated[List[str], SkipValidation]
     timestamp: int
 
 
-class StudentProfileResponse(BaseModel):
+class StudentProfileResponse(TypedDict):
     """Comprehensive student profile response"""
     student_id: str
-    cognitive_load_summary: Dict[str, Any]
-    performance_summary: Dict[str, Any]
-    engagement_summary: Dict[str, Any]
+    cognitive_load_summary: dict
+    performance_summary: dict
+    engagement_summary: dict
     combined_health_score: float
     risk_level: str
-    recommended_actions: List[str]
+    recommended_actions: Annotated[List[str], SkipValidation]
     generated_at: str
 
 
-class CurriculumStateResponse(BaseModel):
+class CurriculumStateResponse(SchemaBase):
     """Current curriculum state response"""
     student_id: str
     learning_path_id: str
@@ -265,16 +318,16 @@ class CurriculumStateResponse(BaseModel):
     difficulty: str
     current_module_id: Optional[str]
     progress: float
-    completed_modules: List[str]
+    completed_modules: Annotated[List[str], SkipValidation]
     last_updated: Optional[str]
     last_accessed: Optional[str]
-    recent_adjustments: List[Dict[str, Any]]
+    recent_adjustments: Annotated[List[dict], SkipValidation]
 
 
-class LearningPathResponse(BaseModel):
+class LearningPathResponse(SchemaBase):
     """Complete learning path structure"""
     learning_path_id: str
-    modules: List[Dict[str, Any]]
+    modules: Annotated[List[dict], SkipValidation]
     total_modules: int
     completed_count: int
     difficulty_distribution: Dict[str, int]
@@ -282,62 +335,63 @@ class LearningPathResponse(BaseModel):
     is_valid: bool
 
 
-class AdjustmentRecommendation(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class AdjustmentRecommendation:
     """AI-generated curriculum adjustment recommendation"""
     type: str
     priority: str
     description: str
     reasoning: str
-    estimated_impact: Dict[str, Any]
+    estimated_impact: dict
     confidence: float
 
 
-class CurriculumHistoryResponse(BaseModel):
+class CurriculumHistoryResponse(TypedDict):
     """Curriculum adjustment history entry"""
     id: str
     learning_path_id: str
     change_type: str
-    previous_state: Dict[str, Any]
-    new_state: Dict[str, Any]
+    previous_state: dict
+    new_state: dict
     reason: str
     created_at: Optional[str]
 
 
 # ===== Content Generation Schemas =====
 
-class GenerateContentRequest(BaseModel):
+class GenerateContentRequest(SchemaBase):
     """Request to generate educational content"""
-    topic: str = Field(..., description="Content topic")
-    content_type: str = Field(..., description="Type: lesson, quiz, exercise, recap")
-    difficulty: str = Field(..., description="Difficulty: easy, medium, hard")
-    student_id: str = Field(..., description="Student UUID")
-    learning_path_id: str = Field(..., description="Learning path UUID")
-    cognitive_load_profile: Dict[str, Any] = Field(..., description="Student's cognitive load data")
-    prerequisites: List[str] = Field(default_factory=list, description="Prerequisite topics")
-    estimated_minutes: Optional[int] = Field(None, description="Target duration in minutes")
+    topic: str  # Content topic
+    content_type: str  # Type: lesson, quiz, exercise, recap
+    difficulty: str  # Difficulty: easy, medium, hard
+    student_id: str  # Student UUID
+    learning_path_id: str  # Learning path UUID
+    cognitive_load_profile: dict  # Student's cognitive load data
+    prerequisites: List[str] = Field(default_factory=list)  # Prerequisite topics
+    estimated_minutes: Optional[int] = None  # Target duration in minutes
 
 
-class GeneratedContentResponse(BaseModel):
+class GeneratedContentResponse(SchemaBase):
     """Response with generated content"""
-    content_id: str = Field(..., description="Generated content module ID")
+    content_id: str  # Generated content module ID
     topic: str
     content_type: str
     difficulty: str
-    content: str = Field(..., description="Content as JSON or Markdown")
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    content: str  # Content as JSON or Markdown
+    metadata: dict = Field(default_factory=dict)
     estimated_minutes: int
-    prerequisites: List[str] = Field(default_factory=list)
+    prerequisites: Annotated[List[str], SkipValidation] = Field(default_factory=list)
     generated_at: str
-    cached: bool = Field(False, description="Whether content was served from cache")
+    cached: bool = False  # Whether content was served from cache
 
 
-class ContentVariationRequest(BaseModel):
+class ContentVariationRequest(SchemaBase):
     """Request to generate content variation"""
-    variation_type: str = Field(..., description="Type: easier, harder, alternative")
-    cognitive_load_profile: Dict[str, Any] = Field(..., description="Current cognitive load")
+    variation_type: str  # Type: easier, harder, alternative
+    cognitive_load_profile: dict  # Current cognitive load
 
 
-class ContentVariationResponse(BaseModel):
+class ContentVariationResponse(SchemaBase):
     """Response with content variation"""
     original_content_id: str
     variation_content_id: str
@@ -346,24 +400,24 @@ class ContentVariationResponse(BaseModel):
     difficulty_change: Optional[str] = None
 
 
-class BatchGenerateRequest(BaseModel):
+class BatchGenerateRequest(SchemaBase):
     """Request to generate multiple content modules"""
-    topics: List[str] = Field(..., description="List of topics to generate")
-    difficulty_progression: List[str] = Field(..., description="Difficulty for each topic")
+    topics: List[str]  # List of topics to generate
+    difficulty_progression: List[str]  # Difficulty for each topic
     student_id: str
     learning_path_id: str
-    cognitive_load_profile: Dict[str, Any]
+    cognitive_load_profile: dict
 
 
-class BatchGenerateResponse(BaseModel):
+class BatchGenerateResponse(SchemaBase):
     """Response with batch generated content IDs"""
-    generated_content_ids: List[str]
+    generated_content_ids: Annotated[List[str], SkipValidation]
     total_generated: int
-    failed_topics: List[str] = Field(default_factory=list)
+    failed_topics: Annotated[List[str], SkipValidation] = Field(default_factory=list)
     generation_time_seconds: float
 
 
-class ContentModuleResponse(BaseModel):
+class ContentModuleResponse(SchemaBase):
     """Response with content module details"""
     id: str
     title: str
@@ -371,12 +425,12 @@ class ContentModuleResponse(BaseModel):
     module_type: str
     difficulty: str
     estimated_minutes: int
-    prerequisites: List[str] = Field(default_factory=list)
+    prerequisites: Annotated[List[str], SkipValidation] = Field(default_factory=list)
     created_at: Optional[str] = None
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    metadata: dict = Field(default_factory=dict)
 
 
-class ContentSearchRequest(BaseModel):
+class ContentSearchRequest(SchemaBase):
     """Request to search content"""
     topic: Optional[str] = None
     difficulty: Optional[str] = None
@@ -385,7 +439,7 @@ class ContentSearchRequest(BaseModel):
     limit: int = Field(10, ge=1, le=100)
 
 
-class ContentCacheStatsResponse(BaseModel):
+class ContentCacheStatsResponse(SchemaBase):
     """Cache performance statistics"""
     cache_hits: int
     cache_misses: int
@@ -4,15 +4,37 @@ Comprehensive intervention engine with rule-based triggers,
 LLM-powered personalized messaging, and effectiveness tracking.
 """
 
+from importlib import import_module
+
 from motivation.intervention_types import InterventionType, INTERVENTION_CONFIGS
-from motivation.intervention_rules import InterventionRuleEngine
-from motivation.message_generator import PersonalizedMessageGenerator
-from motivation.effectiveness_tracker import InterventionEffectivenessTracker
+
+# Components that pull in LangChain, SQLAlchemy or Redis are imported on
+# first attribute access (PEP 562) so importing the package stays cheap
+_LAZY_IMPORTS = {
+    "InterventionRuleEngine": "motivation.intervention_rules",
+    "PersonalizedMessageGenerator": "motivation.message_generator",
+    "BatchingMessageService": "motivation.message_batching",
+    "InterventionEffectivenessTracker": "motivation.effectiveness_tracker",
+}
 
 __all__ = [
     "InterventionType",
     "INTERVENTION_CONFIGS",
     "InterventionRuleEngine",
     "PersonalizedMessageGenerator",
+    "BatchingMessageService",
     "InterventionEffectivenessTracker",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,16 +5,47 @@ Tracks intervention outcomes by measuring metrics before and after
 interventions to calculate effectiveness scores.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
+import json
 import logging
 import asyncio
+import time
 
 from sqlalchemy import text
-from config.database import get_async_db
+from config.database import async_engine
 from config.redis_client import redis_client
+from config.settings import settings
 from services.intervention_storage import InterventionStorageService
 
+# Redis key suffix (student:{id}:{suffix}) -> post-intervention metric name
+REDIS_METRIC_KEYS = {
+    "cognitive_load": "cognitive_load",
+    "engagement": "engagement_score",
+    "mood": "mood_score",
+}
+
+# Quiz results from the last hour; served by the (studentId, completedAt) index
+RECENT_PERFORMANCE_QUERY = text("""
+    SELECT 
+        AVG(score) as avg_score,
+        COUNT(*) as quiz_count
+    FROM quiz_results
+    WHERE "studentId" = :student_id
+      AND "completedAt" >= NOW() - INTERVAL '1 hour'
+""")
+
+# Delay between delivering an intervention and measuring its effect
+EFFECTIVENESS_WINDOW_SECONDS = settings.INTERVENTION_EFFECTIVENESS_WINDOW_MINUTES * 60
+
+# Pending measurements: sorted set of JSON payloads scored by due time (ms)
+DUE_MEASUREMENTS_KEY = "intervention:effectiveness_due"
+DUE_POLL_INTERVAL_SECONDS = 5
+DUE_BATCH_SIZE = 100
+
+# Measurements for the same student within this window share one fetch
+METRICS_CACHE_TTL_SECONDS = 10
+
 
 class InterventionEffectivenessTracker:
     """Tracks and measures intervention effectiveness"""
@@ -22,6 +53,28 @@ class InterventionEffectivenessTracker:
     def __init__(self):
         self.logger = logging.getLogger("InterventionEffectivenessTracker")
         self.storage = InterventionStorageService()
+        self.tasks: Set[asyncio.Task] = set()
+        self.is_running = False
+        # student_id -> (fetch start time, task fetching that student's metrics)
+        self._metrics_cache: Dict[str, Tuple[float, asyncio.Task]] = {}
+    
+    async def start(self):
+        """Start polling Redis for measurements that have come due."""
+        if self.is_running:
+            self.logger.warning("Effectiveness tracker already running")
+            return
+        
+        self.is_running = True
+        self._track_task(asyncio.create_task(self._due_measurement_poller()))
+    
+    async def stop(self):
+        """Stop the poller and any measurements in progress."""
+        self.is_running = False
+        
+        for task in self.tasks:
+            task.cancel()
+        
+        await asyncio.gather(*self.tasks, return_exceptions=True)
     
     async def track_intervention_outcome(
         self,
@@ -84,26 +137,9 @@ class InterventionEffectivenessTracker:
             # Wait for effectiveness window
             await asyncio.sleep(60)  # Wait 1 minute for immediate check
             
-            metrics = {}
-            
-            # Fetch cognitive load from Redis time-series (if available)
-            cognitive_load = await self._get_recent_cognitive_load(student_id)
-            if cognitive_load is not None:
-                metrics["cognitive_load"] = cognitive_load
-            
-            # Fetch performance data from PostgreSQL
-            performance_data = await self._get_recent_performance(student_id)
-            metrics.update(performance_data)
-            
-            # Fetch engagement metrics
-            engagement = await self._get_recent_engagement(student_id)
-            if engagement is not None:
-                metrics["engagement_score"] = engagement
-            
-            # Fetch mood data
-            mood = await self._get_recent_mood(student_id)
-            if mood is not None:
-                metrics["mood_score"] = mood
+            # Shielded so cancelling this measurement leaves the shared fetch
+            # running for the others awaiting it
+            metrics = dict(await asyncio.shield(self._get_cached_recent_metrics(student_id)))
             
             self.logger.info(
                 f"Post-intervention metrics for {student_id}: {metrics}"
@@ -134,16 +170,17 @@ class InterventionEffectivenessTracker:
             pre_metrics: Metrics before intervention
         """
         try:
-            # Create background task
-            asyncio.create_task(
-                self._measure_effectiveness_after_delay(
-                    intervention_id=intervention_id,
-                    student_id=student_id,
-                    intervention_time=intervention_time,
-                    intervention_type=intervention_type,
-                    pre_metrics=pre_metrics
-                )
-            )
+            # Queue in Redis so pending measurements cost no memory here and
+            # survive worker restarts
+            due_at = int((time.time() + EFFECTIVENESS_WINDOW_SECONDS) * 1000)
+            payload = json.dumps({
+                "intervention_id": intervention_id,
+                "student_id": student_id,
+                "intervention_time": intervention_time,
+                "intervention_type": intervention_type,
+                "pre_metrics": pre_metrics
+            }, default=str)
+            await redis_client.data_client.zadd(DUE_MEASUREMENTS_KEY, {payload: due_at})
             
             self.logger.info(
                 f"Scheduled effectiveness measurement for intervention {intervention_id}"
@@ -152,7 +189,37 @@ class InterventionEffectivenessTracker:
         except Exception as e:
             self.logger.error(f"Failed to schedule effectiveness measurement: {e}", exc_info=True)
     
-    async def _measure_effectiveness_after_delay(
+    async def _due_measurement_poller(self):
+        """Run queued measurements once their effectiveness window has passed."""
+        while self.is_running:
+            try:
+                now = int(time.time() * 1000)
+                payloads = await redis_client.data_client.zrangebyscore(
+                    DUE_MEASUREMENTS_KEY, '-inf', now, start=0, num=DUE_BATCH_SIZE
+                )
+                
+                for payload in payloads:
+                    # ZREM succeeds for exactly one worker, which claims the entry
+                    if await redis_client.data_client.zrem(DUE_MEASUREMENTS_KEY, payload):
+                        self._track_task(asyncio.create_task(
+                            self._measure_effectiveness(**json.loads(payload))
+                        ))
+                
+                if len(payloads) < DUE_BATCH_SIZE:
+                    await asyncio.sleep(DUE_POLL_INTERVAL_SECONDS)
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Error polling due effectiveness measurements: {e}", exc_info=True)
+                await asyncio.sleep(DUE_POLL_INTERVAL_SECONDS)
+    
+    def _track_task(self, task: asyncio.Task):
+        """Keep a reference to a running measurement until it finishes."""
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+    
+    async def _measure_effectiveness(
         self,
         intervention_id: str,
         student_id: str,
@@ -161,7 +228,7 @@ class InterventionEffectivenessTracker:
         pre_metrics: Dict[str, Any]
     ):
         """
-        Wait for effectiveness window then measure and track outcome.
+        Measure and track outcome once the effectiveness window has passed.
         
         Args:
             intervention_id: Intervention UUID
@@ -171,11 +238,6 @@ class InterventionEffectivenessTracker:
             pre_metrics: Metrics before intervention
         """
         try:
-            # Wait for effectiveness window
-            from config.settings import settings
-            wait_seconds = settings.INTERVENTION_EFFECTIVENESS_WINDOW_MINUTES * 60
-            await asyncio.sleep(wait_seconds)
-            
             # Measure post-intervention metrics
             post_metrics = await self.measure_post_intervention_metrics(
                 student_id=student_id,
@@ -196,67 +258,81 @@ class InterventionEffectivenessTracker:
         except Exception as e:
             self.logger.error(f"Error in delayed effectiveness measurement: {e}", exc_info=True)
     
-    async def _get_recent_cognitive_load(self, student_id: str) -> Optional[float]:
-        """Get most recent cognitive load score from Redis"""
+    def _get_cached_recent_metrics(self, student_id: str) -> asyncio.Task:
+        """
+        Return the task fetching a student's recent metrics.
+        
+        Concurrent or closely spaced measurements for the same student await
+        the same fetch instead of repeating the Redis and PostgreSQL reads.
+        Callers await it through asyncio.shield, and a failed fetch is evicted
+        so the next measurement retries it.
+        """
+        now = time.monotonic()
+        cached = self._metrics_cache.get(student_id)
+        if cached is not None and now - cached[0] < METRICS_CACHE_TTL_SECONDS:
+            return cached[1]
+        
+        # Drop expired entries so the cache only holds recent students
+        self._metrics_cache = {
+            key: entry for key, entry in self._metrics_cache.items()
+            if now - entry[0] < METRICS_CACHE_TTL_SECONDS
+        }
+        
+        task = asyncio.ensure_future(self._fetch_recent_metrics(student_id))
+        task.add_done_callback(lambda done: self._evict_failed_fetch(student_id, done))
+        self._metrics_cache[student_id] = (now, task)
+        return task
+    
+    def _evict_failed_fetch(self, student_id: str, task: asyncio.Task):
+        """Drop a failed or cancelled metrics fetch from the cache"""
+        if not task.cancelled() and task.exception() is None:
+            return
+        cached = self._metrics_cache.get(student_id)
+        if cached is not None and cached[1] is task:
+            del self._metrics_cache[student_id]
+    
+    async def _fetch_recent_metrics(self, student_id: str) -> Dict[str, Any]:
+        """Fetch Redis and PostgreSQL metrics for a student concurrently"""
+        # Fetch cognitive load, engagement and mood from Redis while the
+        # performance query runs against PostgreSQL
+        redis_metrics, performance_data = await asyncio.gather(
+            self._get_recent_redis_metrics(student_id),
+            self._get_recent_performance(student_id)
+        )
+        return {**redis_metrics, **performance_data}
+    
+    async def _get_recent_redis_metrics(self, student_id: str) -> Dict[str, float]:
+        """Get the latest cognitive load, engagement and mood scores from Redis"""
+        metrics = {}
         try:
-            # Try to get from Redis time-series or latest state
-            key = f"student:{student_id}:cognitive_load"
-            value = redis_client.client.get(key)
-            if value:
-                return float(value)
+            values = await redis_client.data_client.mget(
+                [f"student:{student_id}:{suffix}" for suffix in REDIS_METRIC_KEYS]
+            )
+            for metric_name, value in zip(REDIS_METRIC_KEYS.values(), values):
+                if value:
+                    metrics[metric_name] = float(value)
         except Exception as e:
-            self.logger.debug(f"Failed to get cognitive load from Redis: {e}")
-        return None
+            self.logger.debug(f"Failed to get recent metrics from Redis: {e}")
+        return metrics
     
     async def _get_recent_performance(self, student_id: str) -> Dict[str, Any]:
         """Get recent performance metrics from PostgreSQL"""
         try:
-            async for db in get_async_db():
-                # Get most recent quiz results
-                query = text("""
-                    SELECT 
-                        AVG(score) as avg_score,
-                        COUNT(*) as quiz_count
-                    FROM quiz_results
-                    WHERE "studentId" = :student_id
-                      AND "completedAt" >= NOW() - INTERVAL '1 hour'
-                """)
-                
-                result = await db.execute(query, {"student_id": student_id})
+            # Single read-only query: use a plain connection, no ORM session
+            async with async_engine.connect() as conn:
+                result = await conn.execute(RECENT_PERFORMANCE_QUERY, {"student_id": student_id})
                 row = result.fetchone()
-                
-                if row and row[1] > 0:
-                    return {
-                        "quiz_accuracy": float(row[0]),
-                        "quiz_count": row[1]
-                    }
+            
+            if row and row[1] > 0:
+                return {
+                    "quiz_accuracy": float(row[0]),
+                    "quiz_count": row[1]
+                }
         except Exception as e:
             self.logger.debug(f"Failed to get performance data: {e}")
         
         return {}
     
-    async def _get_recent_engagement(self, student_id: str) -> Optional[float]:
-        """Get recent engagement score"""
-        try:
-            key = f"student:{student_id}:engagement"
-            value = redis_client.client.get(key)
-            if value:
-                return float(value)
-        except Exception as e:
-            self.logger.debug(f"Failed to get engagement from Redis: {e}")
-        return None
-    
-    async def _get_recent_mood(self, student_id: str) -> Optional[float]:
-        """Get recent mood score"""
-        try:
-            key = f"student:{student_id}:mood"
-            value = redis_client.client.get(key)
-            if value:
-                return float(value)
-        except Exception as e:
-            self.logger.debug(f"Failed to get mood from Redis: {e}")
-        return None
-    
     def _calculate_effectiveness_score(
         self,
         pre_metrics: Dict[str, Any],
@@ -279,3 +355,7 @@ class InterventionEffectivenessTracker:
         """
         # This will be calculated by storage service
         return 0.5
+
+
+# Global instance whose poller runs the queued measurements
+effectiveness_tracker = InterventionEffectivenessTracker()
@@ -5,17 +5,34 @@ Rule-based system that analyzes agent state and determines
 which interventions should be triggered.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, NamedTuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 import logging
+import time
 
 from agents.state import AgentState
 from motivation.intervention_types import InterventionType, InterventionPriority
 from config.settings import settings
 
 
-@dataclass
+# Priority ranks, higher is more urgent (used for dedup comparisons)
+_PRIORITY_RANK = {
+    InterventionPriority.CRITICAL: 4,
+    InterventionPriority.HIGH: 3,
+    InterventionPriority.MEDIUM: 2,
+    InterventionPriority.LOW: 1
+}
+
+# Output ordering, critical first
+_SORT_RANK = {
+    InterventionPriority.CRITICAL: 0,
+    InterventionPriority.HIGH: 1,
+    InterventionPriority.MEDIUM: 2,
+    InterventionPriority.LOW: 3
+}
+
+
+@dataclass(slots=True)
 class InterventionTrigger:
     """Represents a triggered intervention"""
     intervention_type: InterventionType
@@ -25,6 +42,104 @@ class InterventionTrigger:
     confidence: float  # 0-1 score indicating trigger confidence
 
 
+class _StateView(NamedTuple):
+    """Snapshot of the state fields the rules compare, taken once per evaluation"""
+    cognitive_load: float
+    quiz_accuracy: float
+    plateau_detected: bool
+    weak_topics: List[str]
+    avoidance_behavior: Dict[str, Any]
+    cognitive_patterns: Dict[str, Any]
+    mood_score: float
+    session_duration: float
+    night_degradation: bool
+    dropout_risk: float
+    state: AgentState  # context-only fields are read from here after deduplication
+
+
+def _state_view(state: AgentState) -> _StateView:
+    """Read every rule input from the agent state in one pass (fields in _StateView order)"""
+    get = state.get
+    return _StateView(
+        get("cognitive_load_score", 0),
+        get("quiz_accuracy", 100),
+        get("plateau_detected", False),
+        get("weak_topics", []),
+        get("avoidance_behavior", {}),
+        get("cognitive_patterns", {}),
+        get("mood_score", 0),
+        get("session_duration_minutes", 0),
+        get("night_degradation_detected", False),
+        get("dropout_risk_score", 0),
+        state
+    )
+
+
+# Compact trigger emitted by the rule checks:
+# (type, priority, confidence, reason template, reason value, context builder).
+# Only specs that survive deduplication are turned into InterventionTrigger objects.
+_TriggerSpec = Tuple[
+    InterventionType, InterventionPriority, float, str, Any, Callable[[_StateView], Dict[str, Any]]
+]
+
+
+def _very_low_accuracy_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "quiz_accuracy": view.quiz_accuracy,
+        "weak_topics": view.weak_topics,
+        "plateau_detected": view.plateau_detected
+    }
+
+
+def _accuracy_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "quiz_accuracy": view.quiz_accuracy,
+        "weak_topics": view.weak_topics
+    }
+
+
+def _plateau_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "plateau_detected": True,
+        "quiz_accuracy": view.quiz_accuracy,
+        "learning_velocity": view.state.get("learning_velocity", 0)
+    }
+
+
+def _avoidance_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "avoided_topics": view.avoidance_behavior["avoided_topics"],
+        "avoidance_behavior": view.avoidance_behavior
+    }
+
+
+def _error_clustering_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "error_clustering": True,
+        "patterns": view.cognitive_patterns
+    }
+
+
+def _night_degradation_context(view: _StateView) -> Dict[str, Any]:
+    return {
+        "night_degradation": True,
+        "time_of_day": view.state.get("time_of_day", "day"),
+        "session_duration": view.session_duration
+    }
+
+
+def _inflate(spec: _TriggerSpec, view: _StateView) -> InterventionTrigger:
+    """Build the full trigger (reason text and context) for a surviving spec"""
+    intervention_type, priority, confidence, reason, value, build_context = spec
+    return InterventionTrigger(
+        intervention_type=intervention_type,
+        priority=priority,
+        trigger_reason=reason.format(v=value),
+        context=build_context(view),
+        confidence=confidence
+    )
+
+
 class InterventionRuleEngine:
     """Evaluates rules and determines which interventions to trigger"""
     
@@ -45,10 +160,76 @@ class InterventionRuleEngine:
     DROPOUT_RISK_HIGH = 0.6
     DROPOUT_RISK_CRITICAL = 0.8
     
+    # Tiered rules: (threshold, priority, confidence, reason template, context builder),
+    # most severe tier first; the first tier the value reaches fires
+    _COGNITIVE_LOAD_TIERS = (
+        (COGNITIVE_LOAD_CRITICAL, InterventionPriority.CRITICAL, 0.95,
+         "Critical cognitive load: {v}/100",
+         lambda view: {
+             "cognitive_load": view.cognitive_load,
+             "fatigue_level": view.state.get("mental_fatigue_level", "unknown"),
+             "session_duration": view.session_duration
+         }),
+        (COGNITIVE_LOAD_HIGH, InterventionPriority.HIGH, 0.85,
+         "High cognitive load: {v}/100",
+         lambda view: {
+             "cognitive_load": view.cognitive_load,
+             "fatigue_level": view.state.get("mental_fatigue_level", "unknown")
+         }),
+    )
+    
+    # Mood tiers fire when the score falls below the threshold
+    _MOOD_TIERS = (
+        (MOOD_FRUSTRATED, InterventionPriority.HIGH, 0.85,
+         "Negative mood detected: {v:.2f}",
+         lambda view: {
+             "mood_score": view.mood_score,
+             "sentiment_trend": view.state.get("sentiment_trend", "neutral"),
+             "dominant_emotion": view.state.get("dominant_emotion", "unknown")
+         }),
+        (MOOD_CONFUSED, InterventionPriority.MEDIUM, 0.7,
+         "Slightly negative mood: {v:.2f}",
+         lambda view: {
+             "mood_score": view.mood_score,
+             "sentiment_trend": view.state.get("sentiment_trend", "neutral")
+         }),
+    )
+    
+    _SESSION_DURATION_TIERS = (
+        (SESSION_DURATION_CRITICAL, InterventionPriority.CRITICAL, 0.9,
+         "Excessive session duration: {v} minutes",
+         lambda view: {
+             "session_duration": view.session_duration,
+             "time_of_day": view.state.get("time_of_day", "day")
+         }),
+        (SESSION_DURATION_WARNING, InterventionPriority.HIGH, 0.8,
+         "Long session duration: {v} minutes",
+         lambda view: {
+             "session_duration": view.session_duration,
+             "time_of_day": view.state.get("time_of_day", "day")
+         }),
+    )
+    
+    _DROPOUT_RISK_TIERS = (
+        (DROPOUT_RISK_CRITICAL, InterventionPriority.CRITICAL, 0.9,
+         "Critical dropout risk: {v:.2%}",
+         lambda view: {
+             "dropout_risk": view.dropout_risk,
+             "engagement_level": view.state.get("engagement_level", "unknown"),
+             "quiz_accuracy": view.state.get("quiz_accuracy", 0)
+         }),
+        (DROPOUT_RISK_HIGH, InterventionPriority.HIGH, 0.8,
+         "High dropout risk: {v:.2%}",
+         lambda view: {
+             "dropout_risk": view.dropout_risk,
+             "engagement_level": view.state.get("engagement_level", "unknown")
+         }),
+    )
+    
     def __init__(self):
         self.logger = logging.getLogger("InterventionRuleEngine")
     
-    def evaluate_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def evaluate_rules(self, state: AgentState) -> Tuple[InterventionTrigger, ...]:
         """
         Evaluate all intervention rules against current state.
         
@@ -56,265 +237,179 @@ class InterventionRuleEngine:
             state: Current agent state
             
         Returns:
-            List of triggered interventions (deduplicated and prioritized)
+            Tuple of triggered interventions (deduplicated and prioritized)
         """
-        triggers = []
+        return self._evaluate(state, time.time())
+    
+    def evaluate_rules_batch(
+        self,
+        states: List[AgentState]
+    ) -> List[Tuple[InterventionTrigger, ...]]:
+        """
+        Evaluate intervention rules for many students at once.
+        
+        Used by background ticks that score a batch of states; all states
+        are throttled against a single clock reading.
+        
+        Args:
+            states: Agent states to evaluate
+            
+        Returns:
+            Triggered interventions for each state, in input order
+        """
+        current_time = time.time()
+        return [self._evaluate(state, current_time) for state in states]
+    
+    def _evaluate(self, state: AgentState, current_time: float) -> Tuple[InterventionTrigger, ...]:
+        """Run the rule categories for one state and deduplicate the result"""
+        view = _state_view(state)
+        minutes_since_last = (current_time - state.get("last_intervention_time", 0)) / 60
+        specs: List[_TriggerSpec] = []
         
-        # Evaluate each rule category
-        triggers.extend(self._check_cognitive_load_rules(state))
-        triggers.extend(self._check_performance_rules(state))
-        triggers.extend(self._check_avoidance_rules(state))
-        triggers.extend(self._check_mood_rules(state))
-        triggers.extend(self._check_time_based_rules(state))
-        triggers.extend(self._check_dropout_risk_rules(state))
+        if minutes_since_last >= settings.INTERVENTION_MIN_INTERVAL_MINUTES:
+            # Evaluate each rule category
+            for rule in self._RULES:
+                rule(self, view, specs)
+        elif settings.INTERVENTION_CRITICAL_BYPASS_THROTTLE:
+            # Throttled: only critical triggers can survive deduplication,
+            # so skip the categories that never raise one
+            for rule in self._CRITICAL_RULES:
+                rule(self, view, specs)
         
-        # Deduplicate and filter based on throttling
-        filtered_triggers = self._deduplicate_interventions(triggers, state)
+        # Deduplicate and filter based on throttling, then build the survivors
+        filtered_triggers = tuple(
+            _inflate(spec, view) for spec in self._select(specs, minutes_since_last)
+        )
         
         self.logger.info(
-            f"Evaluated intervention rules: {len(triggers)} triggers, "
-            f"{len(filtered_triggers)} after deduplication"
+            "Evaluated intervention rules: %d triggers, %d after deduplication",
+            len(specs), len(filtered_triggers)
         )
         
         return filtered_triggers
     
-    def _check_cognitive_load_rules(self, state: AgentState) -> List[InterventionTrigger]:
-        """Check cognitive load based rules"""
-        triggers = []
-        cognitive_load = state.get("cognitive_load_score", 0)
+    @staticmethod
+    def _apply_tiered(
+        value: float,
+        tiers: tuple,
+        intervention_type: InterventionType,
+        below: bool = False
+    ) -> _TriggerSpec:
+        """
+        Build the spec for the first tier ``value`` reaches (falls below when ``below``).
         
-        if cognitive_load >= self.COGNITIVE_LOAD_CRITICAL:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.BREAK_SUGGESTION,
-                priority=InterventionPriority.CRITICAL,
-                trigger_reason=f"Critical cognitive load: {cognitive_load}/100",
-                context={
-                    "cognitive_load": cognitive_load,
-                    "fatigue_level": state.get("mental_fatigue_level", "unknown"),
-                    "session_duration": state.get("session_duration_minutes", 0)
-                },
-                confidence=0.95
-            ))
-        elif cognitive_load >= self.COGNITIVE_LOAD_HIGH:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.BREAK_SUGGESTION,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"High cognitive load: {cognitive_load}/100",
-                context={
-                    "cognitive_load": cognitive_load,
-                    "fatigue_level": state.get("mental_fatigue_level", "unknown")
-                },
-                confidence=0.85
+        Callers check the least severe threshold first, so the last tier is the fallback.
+        """
+        for tier in tiers:
+            threshold = tier[0]
+            if (value < threshold) if below else (value >= threshold):
+                break
+        _, priority, confidence, reason, build_context = tier
+        return (intervention_type, priority, confidence, reason, value, build_context)
+    
+    def _check_cognitive_load_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
+        """Check cognitive load based rules"""
+        if view.cognitive_load >= self.COGNITIVE_LOAD_HIGH:
+            out.append(self._apply_tiered(
+                view.cognitive_load, self._COGNITIVE_LOAD_TIERS,
+                InterventionType.BREAK_SUGGESTION
             ))
-        
-        return triggers
     
-    def _check_performance_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def _check_performance_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
         """Check performance-based rules"""
-        triggers = []
-        quiz_accuracy = state.get("quiz_accuracy", 100)
-        plateau_detected = state.get("plateau_detected", False)
-        weak_topics = state.get("weak_topics", [])
+        quiz_accuracy = view.quiz_accuracy
         
         if quiz_accuracy < self.QUIZ_ACCURACY_VERY_LOW:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.DIFFICULTY_ADJUSTMENT,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"Very low quiz accuracy: {quiz_accuracy}%",
-                context={
-                    "quiz_accuracy": quiz_accuracy,
-                    "weak_topics": weak_topics,
-                    "plateau_detected": plateau_detected
-                },
-                confidence=0.9
+            out.append((
+                InterventionType.DIFFICULTY_ADJUSTMENT, InterventionPriority.HIGH, 0.9,
+                "Very low quiz accuracy: {v}%", quiz_accuracy, _very_low_accuracy_context
             ))
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.RECAP_PROMPT,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"Low performance requires review: {quiz_accuracy}%",
-                context={
-                    "quiz_accuracy": quiz_accuracy,
-                    "weak_topics": weak_topics
-                },
-                confidence=0.85
+            out.append((
+                InterventionType.RECAP_PROMPT, InterventionPriority.HIGH, 0.85,
+                "Low performance requires review: {v}%", quiz_accuracy, _accuracy_context
             ))
-        elif quiz_accuracy < self.QUIZ_ACCURACY_LOW and weak_topics:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.RECAP_PROMPT,
-                priority=InterventionPriority.MEDIUM,
-                trigger_reason=f"Quiz accuracy below threshold: {quiz_accuracy}%",
-                context={
-                    "quiz_accuracy": quiz_accuracy,
-                    "weak_topics": weak_topics
-                },
-                confidence=0.75
+        elif quiz_accuracy < self.QUIZ_ACCURACY_LOW and view.weak_topics:
+            out.append((
+                InterventionType.RECAP_PROMPT, InterventionPriority.MEDIUM, 0.75,
+                "Quiz accuracy below threshold: {v}%", quiz_accuracy, _accuracy_context
             ))
         
-        if plateau_detected:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.DIFFICULTY_ADJUSTMENT,
-                priority=InterventionPriority.MEDIUM,
-                trigger_reason="Learning plateau detected",
-                context={
-                    "plateau_detected": True,
-                    "quiz_accuracy": quiz_accuracy,
-                    "learning_velocity": state.get("learning_velocity", 0)
-                },
-                confidence=0.7
+        if view.plateau_detected:
+            out.append((
+                InterventionType.DIFFICULTY_ADJUSTMENT, InterventionPriority.MEDIUM, 0.7,
+                "Learning plateau detected", None, _plateau_context
             ))
-        
-        return triggers
     
-    def _check_avoidance_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def _check_avoidance_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
         """Check avoidance pattern rules"""
-        triggers = []
-        avoidance_behavior = state.get("avoidance_behavior", {})
-        cognitive_patterns = state.get("cognitive_patterns", {})
-        
         # Check for topic avoidance
-        if avoidance_behavior and isinstance(avoidance_behavior, dict):
-            avoided_topics = avoidance_behavior.get("avoided_topics", [])
-            if avoided_topics:
-                triggers.append(InterventionTrigger(
-                    intervention_type=InterventionType.TOPIC_SWITCH,
-                    priority=InterventionPriority.MEDIUM,
-                    trigger_reason=f"Topic avoidance detected: {len(avoided_topics)} topics",
-                    context={
-                        "avoided_topics": avoided_topics,
-                        "avoidance_behavior": avoidance_behavior
-                    },
-                    confidence=0.75
-                ))
+        avoided_topics = (view.avoidance_behavior or {}).get("avoided_topics")
+        if avoided_topics:
+            out.append((
+                InterventionType.TOPIC_SWITCH, InterventionPriority.MEDIUM, 0.75,
+                "Topic avoidance detected: {v} topics", len(avoided_topics), _avoidance_context
+            ))
         
         # Check for error clustering pattern
-        if cognitive_patterns and isinstance(cognitive_patterns, dict):
-            error_clustering = cognitive_patterns.get("error_clustering_detected", False)
-            if error_clustering:
-                triggers.append(InterventionTrigger(
-                    intervention_type=InterventionType.TOPIC_SWITCH,
-                    priority=InterventionPriority.HIGH,
-                    trigger_reason="Error clustering pattern detected",
-                    context={
-                        "error_clustering": True,
-                        "patterns": cognitive_patterns
-                    },
-                    confidence=0.8
-                ))
-        
-        return triggers
+        cognitive_patterns = view.cognitive_patterns
+        if cognitive_patterns and cognitive_patterns.get("error_clustering_detected"):
+            out.append((
+                InterventionType.TOPIC_SWITCH, InterventionPriority.HIGH, 0.8,
+                "Error clustering pattern detected", None, _error_clustering_context
+            ))
     
-    def _check_mood_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def _check_mood_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
         """Check mood-based rules"""
-        triggers = []
-        mood_score = state.get("mood_score", 0)
-        sentiment_trend = state.get("sentiment_trend", "neutral")
-        
-        if mood_score < self.MOOD_FRUSTRATED:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.ENCOURAGEMENT,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"Negative mood detected: {mood_score:.2f}",
-                context={
-                    "mood_score": mood_score,
-                    "sentiment_trend": sentiment_trend,
-                    "dominant_emotion": state.get("dominant_emotion", "unknown")
-                },
-                confidence=0.85
+        if view.mood_score < self.MOOD_CONFUSED:
+            out.append(self._apply_tiered(
+                view.mood_score, self._MOOD_TIERS,
+                InterventionType.ENCOURAGEMENT, below=True
             ))
-        elif mood_score < self.MOOD_CONFUSED:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.ENCOURAGEMENT,
-                priority=InterventionPriority.MEDIUM,
-                trigger_reason=f"Slightly negative mood: {mood_score:.2f}",
-                context={
-                    "mood_score": mood_score,
-                    "sentiment_trend": sentiment_trend
-                },
-                confidence=0.7
-            ))
-        
-        return triggers
     
-    def _check_time_based_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def _check_time_based_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
         """Check time-based rules (session duration, night degradation)"""
-        triggers = []
-        session_duration = state.get("session_duration_minutes", 0)
-        time_of_day = state.get("time_of_day", "day")
-        night_degradation = state.get("night_degradation_detected", False)
-        
-        if session_duration >= self.SESSION_DURATION_CRITICAL:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.BREAK_SUGGESTION,
-                priority=InterventionPriority.CRITICAL,
-                trigger_reason=f"Excessive session duration: {session_duration} minutes",
-                context={
-                    "session_duration": session_duration,
-                    "time_of_day": time_of_day
-                },
-                confidence=0.9
-            ))
-        elif session_duration >= self.SESSION_DURATION_WARNING:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.BREAK_SUGGESTION,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"Long session duration: {session_duration} minutes",
-                context={
-                    "session_duration": session_duration,
-                    "time_of_day": time_of_day
-                },
-                confidence=0.8
+        if view.session_duration >= self.SESSION_DURATION_WARNING:
+            out.append(self._apply_tiered(
+                view.session_duration, self._SESSION_DURATION_TIERS,
+                InterventionType.BREAK_SUGGESTION
             ))
         
-        if night_degradation:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.BREAK_SUGGESTION,
-                priority=InterventionPriority.HIGH,
-                trigger_reason="Night degradation pattern detected",
-                context={
-                    "night_degradation": True,
-                    "time_of_day": time_of_day,
-                    "session_duration": session_duration
-                },
-                confidence=0.75
+        if view.night_degradation:
+            out.append((
+                InterventionType.BREAK_SUGGESTION, InterventionPriority.HIGH, 0.75,
+                "Night degradation pattern detected", None, _night_degradation_context
             ))
-        
-        return triggers
     
-    def _check_dropout_risk_rules(self, state: AgentState) -> List[InterventionTrigger]:
+    def _check_dropout_risk_rules(self, view: _StateView, out: List[_TriggerSpec]) -> None:
         """Check dropout risk rules"""
-        triggers = []
-        dropout_risk = state.get("dropout_risk_score", 0)
-        
-        if dropout_risk >= self.DROPOUT_RISK_CRITICAL:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.ENCOURAGEMENT,
-                priority=InterventionPriority.CRITICAL,
-                trigger_reason=f"Critical dropout risk: {dropout_risk:.2%}",
-                context={
-                    "dropout_risk": dropout_risk,
-                    "engagement_level": state.get("engagement_level", "unknown"),
-                    "quiz_accuracy": state.get("quiz_accuracy", 0)
-                },
-                confidence=0.9
-            ))
-        elif dropout_risk >= self.DROPOUT_RISK_HIGH:
-            triggers.append(InterventionTrigger(
-                intervention_type=InterventionType.ENCOURAGEMENT,
-                priority=InterventionPriority.HIGH,
-                trigger_reason=f"High dropout risk: {dropout_risk:.2%}",
-                context={
-                    "dropout_risk": dropout_risk,
-                    "engagement_level": state.get("engagement_level", "unknown")
-                },
-                confidence=0.8
+        if view.dropout_risk >= self.DROPOUT_RISK_HIGH:
+            out.append(self._apply_tiered(
+                view.dropout_risk, self._DROPOUT_RISK_TIERS,
+                InterventionType.ENCOURAGEMENT
             ))
-        
-        return triggers
+    
+    # Rule categories in evaluation order; each appends its specs for the view.
+    # The order also breaks output ties between types of equal priority and confidence.
+    _RULES = (
+        _check_cognitive_load_rules,
+        _check_performance_rules,
+        _check_avoidance_rules,
+        _check_mood_rules,
+        _check_time_based_rules,
+        _check_dropout_risk_rules,
+    )
+    # Categories that can raise a critical trigger, in the same relative order
+    _CRITICAL_RULES = (
+        _check_cognitive_load_rules,
+        _check_time_based_rules,
+        _check_dropout_risk_rules,
+    )
     
     def _deduplicate_interventions(
         self, 
         triggers: List[InterventionTrigger],
-        state: AgentState
+        state: AgentState,
+        minutes_since_last: Optional[float] = None
     ) -> List[InterventionTrigger]:
         """
         Deduplicate interventions and apply throttling rules.
@@ -322,6 +417,8 @@ class InterventionRuleEngine:
         Args:
             triggers: List of triggered interventions
             state: Current agent state
+            minutes_since_last: Minutes since the last intervention
+                (computed from state when not given)
             
         Returns:
             Filtered list of interventions
@@ -329,63 +426,77 @@ class InterventionRuleEngine:
         if not triggers:
             return []
         
-        # Get last intervention time
-        last_intervention_time = state.get("last_intervention_time", 0)
-        current_time = datetime.now().timestamp()
-        minutes_since_last = (current_time - last_intervention_time) / 60
+        if minutes_since_last is None:
+            last_intervention_time = state.get("last_intervention_time", 0)
+            minutes_since_last = (time.time() - last_intervention_time) / 60
         
-        # Group by intervention type (take highest priority for each type)
-        type_map: Dict[InterventionType, InterventionTrigger] = {}
-        for trigger in triggers:
-            existing = type_map.get(trigger.intervention_type)
-            if not existing or self._compare_priority(trigger.priority, existing.priority) > 0:
-                type_map[trigger.intervention_type] = trigger
+        entries = [(t.intervention_type, t.priority, t.confidence, t) for t in triggers]
+        return [entry[3] for entry in self._select(entries, minutes_since_last)]
+    
+    def _select(self, entries: List[tuple], minutes_since_last: float) -> List[tuple]:
+        """
+        Keep the highest-priority entry per intervention type that passes throttling.
         
-        # Apply throttling
-        filtered = []
-        for trigger in type_map.values():
-            # Critical interventions bypass throttling if configured
-            if (trigger.priority == InterventionPriority.CRITICAL and 
-                settings.INTERVENTION_CRITICAL_BYPASS_THROTTLE):
-                filtered.append(trigger)
+        Entries are tuples starting with (type, priority, confidence); rule specs and
+        wrapped triggers share this path. Returns survivors sorted critical first.
+        """
+        if not entries:
+            return []
+        
+        # Single entry: nothing to deduplicate or sort
+        if len(entries) == 1:
+            entry = entries[0]
+            return [entry] if self._passes_throttle(entry[0], entry[1], minutes_since_last) else []
+        
+        # Group by intervention type (take highest priority, then highest confidence)
+        type_map: Dict[InterventionType, tuple] = {}
+        for entry in entries:
+            existing = type_map.get(entry[0])
+            if not existing:
+                type_map[entry[0]] = entry
                 continue
-            
-            # Check minimum interval
-            if minutes_since_last >= settings.INTERVENTION_MIN_INTERVAL_MINUTES:
-                filtered.append(trigger)
-            else:
-                self.logger.debug(
-                    f"Throttling {trigger.intervention_type}: "
-                    f"{minutes_since_last:.1f} minutes since last intervention"
-                )
+            order = self._compare_priority(entry[1], existing[1])
+            if order > 0 or (order == 0 and entry[2] > existing[2]):
+                type_map[entry[0]] = entry
+        
+        # Apply throttling
+        filtered = [
+            entry for entry in type_map.values()
+            if self._passes_throttle(entry[0], entry[1], minutes_since_last)
+        ]
         
         # Sort by priority (critical first)
-        priority_order = {
-            InterventionPriority.CRITICAL: 0,
-            InterventionPriority.HIGH: 1,
-            InterventionPriority.MEDIUM: 2,
-            InterventionPriority.LOW: 3
-        }
-        filtered.sort(key=lambda t: (priority_order[t.priority], -t.confidence))
+        filtered.sort(key=lambda e: (_SORT_RANK[e[1]], -e[2]))
         
         return filtered
     
+    def _passes_throttle(
+        self,
+        intervention_type: InterventionType,
+        priority: InterventionPriority,
+        minutes_since_last: float
+    ) -> bool:
+        """Check whether an intervention may fire given the time since the last one"""
+        # Critical interventions bypass throttling if configured
+        if (priority == InterventionPriority.CRITICAL and 
+            settings.INTERVENTION_CRITICAL_BYPASS_THROTTLE):
+            return True
+        
+        # Check minimum interval
+        if minutes_since_last >= settings.INTERVENTION_MIN_INTERVAL_MINUTES:
+            return True
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Throttling %s: %.1f minutes since last intervention",
+                intervention_type, minutes_since_last
+            )
+        return False
+    
     def _compare_priority(
         self, 
         p1: InterventionPriority, 
         p2: InterventionPriority
     ) -> int:
-        """Compare two priorities. Returns 1 if p1 > p2, -1 if p1 < p2, 0 if equal"""
-        priority_values = {
-            InterventionPriority.CRITICAL: 4,
-            InterventionPriority.HIGH: 3,
-            InterventionPriority.MEDIUM: 2,
-            InterventionPriority.LOW: 1
-        }
-        v1 = priority_values[p1]
-        v2 = priority_values[p2]
-        if v1 > v2:
-            return 1
-        elif v1 < v2:
-            return -1
-        return 0
+        """Compare two priorities. Returns > 0 if p1 > p2, < 0 if p1 < p2, 0 if equal"""
+        return _PRIORITY_RANK[p1] - _PRIORITY_RANK[p2]
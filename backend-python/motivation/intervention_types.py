@@ -7,6 +7,7 @@ cooldowns, and effectiveness metrics.
 
 from enum import Enum
 from dataclasses import dataclass
+from types import MappingProxyType
 
 
 class InterventionType(str, Enum):
@@ -34,7 +35,7 @@ class EffectivenessMetric(str, Enum):
     MOOD = "mood"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class InterventionConfig:
     """Configuration for an intervention type"""
     type: InterventionType
@@ -44,7 +45,8 @@ class InterventionConfig:
     description: str
 
 
-INTERVENTION_CONFIGS = {
+# Read-only: configs are shared module-wide and must not be mutated at runtime
+INTERVENTION_CONFIGS = MappingProxyType({
     InterventionType.BREAK_SUGGESTION: InterventionConfig(
         type=InterventionType.BREAK_SUGGESTION,
         default_priority=InterventionPriority.HIGH,
@@ -84,4 +86,4 @@ INTERVENTION_CONFIGS = {
         effectiveness_metric=EffectivenessMetric.ACCURACY,
         description="Adjusts difficulty when student plateaus or consistently struggles"
     ),
-}
+})
@@ -0,0 +1,113 @@
+"""
+Batching Message Service
+
+Coalesces individual intervention message requests from concurrent callers
+into batched LLM calls on PersonalizedMessageGenerator.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+
+from motivation.message_generator import PersonalizedMessageGenerator
+from config.settings import settings
+
+# (intervention_type, context, student_profile) as accepted by generate_messages_batch
+MessageRequest = Tuple[str, Dict[str, Any], Dict[str, Any]]
+
+
+class BatchingMessageService:
+    """Queues message requests and generates them in batches from one worker"""
+    
+    def __init__(
+        self,
+        generator: PersonalizedMessageGenerator,
+        max_batch_size: int = settings.INTERVENTION_BATCH_MAX_SIZE,
+        flush_interval_ms: int = settings.INTERVENTION_BATCH_FLUSH_INTERVAL_MS
+    ):
+        self.generator = generator
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.logger = logging.getLogger("BatchingMessageService")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker_task: Optional[asyncio.Task] = None
+    
+    async def generate_message(
+        self,
+        intervention_type: str,
+        context: Dict[str, Any],
+        student_profile: Dict[str, Any]
+    ) -> str:
+        """
+        Generate a personalized message as part of the next batch.
+        
+        Args:
+            intervention_type: Type of intervention
+            context: Context data for message generation
+            student_profile: Student profile information
+        
+        Returns:
+            Personalized message string
+        """
+        # Started on first use so the worker runs on the caller's event loop
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._worker())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((intervention_type, context, student_profile), future))
+        return await future
+    
+    async def stop(self):
+        """Stop the worker and cancel requests still waiting in the queue."""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            await asyncio.gather(self._worker_task, return_exceptions=True)
+            self._worker_task = None
+        
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+    
+    async def _worker(self):
+        """Collect requests until the batch is full or the flush interval ends."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.flush_interval
+                
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                await self._flush(batch)
+            except asyncio.CancelledError:
+                # Requests already taken off the queue would otherwise never resolve
+                for _, future in batch:
+                    future.cancel()
+                raise
+    
+    async def _flush(self, batch: List[Tuple[MessageRequest, asyncio.Future]]):
+        """Generate one batch and resolve its callers' futures."""
+        requests = [request for request, _ in batch]
+        try:
+            messages = await self.generator.generate_messages_batch(requests)
+        except Exception as e:
+            # LLM failures already become per-item fallback messages, so pass
+            # anything else on to the callers instead of killing the worker
+            self.logger.error(f"Batch message generation failed: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # Callers that gave up (cancelled) no longer need a result
+        for (_, future), message in zip(batch, messages):
+            if not future.done():
+                future.set_result(message)
@@ -5,10 +5,10 @@ Uses LangChain with Google Gemini to generate personalized,
 context-aware intervention messages.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import logging
 import hashlib
-import json
 
 from langchain_core.language_models import BaseLanguageModel
 from langchain_core.prompts import ChatPromptTemplate
@@ -18,29 +18,64 @@ from motivation.intervention_types import InterventionType
 from config.redis_client import redis_client
 from config.settings import settings
 
+try:
+    from redisvl.extensions.cache.llm import SemanticCache
+    from redisvl.utils.vectorize import HFTextVectorizer
+    REDISVL_AVAILABLE = True
+except ImportError:
+    REDISVL_AVAILABLE = False
+    SemanticCache = None
+    HFTextVectorizer = None
+
+
+# Shared by every intervention prompt and always sent first, kept byte-identical
+# across calls so the provider can reuse the cached prefix
+INTERVENTION_SYSTEM_PROMPT = """You are an empathetic learning coach providing supportive interventions to students. 
+Your goal is to help students succeed by offering timely, personalized guidance.
+
+Guidelines:
+- Be brief (1-2 sentences maximum)
+- Be encouraging and positive
+- Be specific to the student's situation
+- Use a warm, supportive tone
+- Focus on actionable advice
+- Avoid being preachy or condescending"""
+
+# Template messages used when the LLM fails
+_FALLBACK_MESSAGES: Dict[str, str] = {
+    InterventionType.BREAK_SUGGESTION: 
+        "You've been working hard! Consider taking a 5-minute break to recharge.",
+    
+    InterventionType.TOPIC_SWITCH: 
+        "This topic seems challenging. Let's try a different approach or review the basics first.",
+    
+    InterventionType.RECAP_PROMPT: 
+        "Let's review some key concepts before moving forward. Mastering the fundamentals will help you succeed.",
+    
+    InterventionType.ENCOURAGEMENT: 
+        "You're making progress! Learning takes time and effort. Keep going, you're doing great!",
+    
+    InterventionType.DIFFICULTY_ADJUSTMENT: 
+        "We're adjusting the pace to better match your learning style. This will help you build confidence.",
+}
+
 
 class PersonalizedMessageGenerator:
     """Generates personalized intervention messages using LLM"""
     
+    BATCH_MAX_CONCURRENCY = 8  # Concurrent LLM requests per batch
+    
     def __init__(self, llm: BaseLanguageModel):
         self.llm = llm
         self.logger = logging.getLogger("PersonalizedMessageGenerator")
         self._init_prompt_templates()
+        self._init_semantic_cache()
     
     def _init_prompt_templates(self):
         """Initialize intervention-specific prompt templates"""
         
         # Base system message for all interventions
-        base_system_message = """You are an empathetic learning coach providing supportive interventions to students. 
-Your goal is to help students succeed by offering timely, personalized guidance.
-
-Guidelines:
-- Be brief (1-2 sentences maximum)
-- Be encouraging and positive
-- Be specific to the student's situation
-- Use a warm, supportive tone
-- Focus on actionable advice
-- Avoid being preachy or condescending"""
+        base_system_message = INTERVENTION_SYSTEM_PROMPT
         
         # Break suggestion template
         self.break_prompt = ChatPromptTemplate.from_messages([
@@ -106,6 +141,55 @@ Generate a brief, uplifting message that acknowledges their effort and encourage
 We're adjusting the difficulty level to better match the student's current capabilities.
 Generate a brief message explaining the adjustment in a positive way.""")
         ])
+        
+        # Pre-built messages for the hot path: the system message is static and
+        # each human template is a plain f-string, so str.format_map renders it
+        # without going through ChatPromptTemplate on every call
+        self.base_system_msg = SystemMessage(content=base_system_message)
+        self._prompt_templates = {
+            InterventionType.BREAK_SUGGESTION: self.break_prompt,
+            InterventionType.TOPIC_SWITCH: self.topic_switch_prompt,
+            InterventionType.RECAP_PROMPT: self.recap_prompt,
+            InterventionType.ENCOURAGEMENT: self.encouragement_prompt,
+            InterventionType.DIFFICULTY_ADJUSTMENT: self.difficulty_adjustment_prompt,
+        }
+        self._human_templates = {
+            intervention_type: prompt.messages[-1].prompt.template
+            for intervention_type, prompt in self._prompt_templates.items()
+        }
+    
+    def _init_semantic_cache(self):
+        """Set up the embedding-based L2 cache behind the exact-key cache"""
+        # One cache index per intervention type, created on first use; the
+        # vectorizer loads an embedding model, so it is shared across them
+        self.semantic_caches: Dict[str, Any] = {}
+        self.vectorizer = None
+        if not settings.INTERVENTION_SEMANTIC_CACHE_ENABLED:
+            return
+        if not REDISVL_AVAILABLE:
+            self.logger.warning("redisvl not available, semantic message cache disabled")
+            return
+        try:
+            self.vectorizer = HFTextVectorizer(settings.INTERVENTION_SEMANTIC_CACHE_MODEL)
+        except Exception as e:
+            self.logger.warning(f"Semantic cache vectorizer failed to load: {e}")
+    
+    def _get_semantic_cache(self, intervention_type: str) -> Optional[Any]:
+        """Get (or create) the semantic cache for an intervention type"""
+        if self.vectorizer is None:
+            return None
+        type_name = getattr(intervention_type, "value", intervention_type)
+        cache = self.semantic_caches.get(type_name)
+        if cache is None:
+            cache = SemanticCache(
+                name=f"intervention_msg_{type_name}",
+                redis_url=settings.REDIS_URL,
+                distance_threshold=settings.INTERVENTION_SEMANTIC_CACHE_DISTANCE_THRESHOLD,
+                ttl=settings.INTERVENTION_MESSAGE_CACHE_TTL_SECONDS,
+                vectorizer=self.vectorizer,
+            )
+            self.semantic_caches[type_name] = cache
+        return cache
     
     async def generate_message(
         self, 
@@ -132,35 +216,117 @@ Generate a brief message explaining the adjustment in a positive way.""")
                 self.logger.debug(f"Using cached message for {intervention_type}")
                 return cached_message
             
-            # Get appropriate prompt template
-            prompt = self._get_prompt_template(intervention_type)
-            
-            # Build context string
+            # Build prompt messages from the context
             prompt_values = self._build_prompt_values(context, student_profile)
+            messages = self._format_messages(intervention_type, prompt_values)
+            
+            # Fall back to a semantically similar earlier context
+            semantic_cache = self._get_semantic_cache(intervention_type)
+            if semantic_cache is not None:
+                summary = messages[-1].content
+                similar_message = await self._get_semantic_message(semantic_cache, summary)
+                if similar_message:
+                    self.logger.debug(f"Using semantically cached message for {intervention_type}")
+                    await self._cache_message(cache_key, similar_message)
+                    return similar_message
             
             # Generate message using LLM
-            message = await self._invoke_llm(prompt, prompt_values, intervention_type)
+            message = await self._invoke_llm(messages, intervention_type)
             
             # Cache the message
             await self._cache_message(cache_key, message)
+            if semantic_cache is not None:
+                await self._cache_semantic_message(
+                    semantic_cache, summary, message, intervention_type
+                )
             
             return message
             
         except Exception as e:
-            self.logger.error(f"Error generating message: {e}", exc_info=True)
+            # Formatting the traceback is costly and the fallback covers the
+            # failure, so only include it when debugging
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Error generating message: {e}", exc_info=True)
+            else:
+                self.logger.warning(f"Error generating message: {e}")
             # Return fallback template message
             return self._get_fallback_message(intervention_type)
     
+    async def generate_messages_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]
+    ) -> List[str]:
+        """
+        Generate personalized messages for many interventions at once.
+        
+        Cached messages are resolved first; the remaining unique requests are
+        sent to the LLM concurrently in a single batch call.
+        
+        Args:
+            items: List of (intervention_type, context, student_profile) tuples
+            
+        Returns:
+            List of messages in input order
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        keys = [self._get_cache_key(*item) for item in items]
+        cached_messages = await self._get_cached_messages(keys)
+        
+        pending = {}  # cache key -> (intervention_type, messages, result indices)
+        for i, (item, cache_key, cached) in enumerate(zip(items, keys, cached_messages)):
+            if cached:
+                results[i] = cached
+            elif cache_key in pending:
+                pending[cache_key][2].append(i)
+            else:
+                intervention_type, context, student_profile = item
+                pending[cache_key] = (
+                    intervention_type,
+                    self._format_messages(
+                        intervention_type,
+                        self._build_prompt_values(context, student_profile)
+                    ),
+                    [i],
+                )
+        
+        if not pending:
+            return results
+        
+        try:
+            responses = await self.llm.abatch(
+                [messages for _, messages, _ in pending.values()],
+                config={'max_concurrency': self.BATCH_MAX_CONCURRENCY},
+                return_exceptions=True
+            )
+        except Exception as e:
+            responses = [e] * len(pending)
+        
+        generated = {}
+        for (cache_key, (intervention_type, _, indices)), response in zip(pending.items(), responses):
+            if isinstance(response, Exception):
+                self.logger.error(f"Error generating message: {response}")
+                message = self._get_fallback_message(intervention_type)
+            else:
+                message = self._extract_message(response)
+                generated[cache_key] = message
+            for i in indices:
+                results[i] = message
+        
+        if generated:
+            await self._cache_messages(generated)
+        self.logger.info(f"Generated {len(generated)} messages in batch of {len(items)}")
+        return results
+    
     def _get_prompt_template(self, intervention_type: str) -> ChatPromptTemplate:
         """Get prompt template for intervention type"""
-        type_map = {
-            InterventionType.BREAK_SUGGESTION: self.break_prompt,
-            InterventionType.TOPIC_SWITCH: self.topic_switch_prompt,
-            InterventionType.RECAP_PROMPT: self.recap_prompt,
-            InterventionType.ENCOURAGEMENT: self.encouragement_prompt,
-            InterventionType.DIFFICULTY_ADJUSTMENT: self.difficulty_adjustment_prompt,
-        }
-        return type_map.get(intervention_type, self.encouragement_prompt)
+        return self._prompt_templates.get(intervention_type, self.encouragement_prompt)
+    
+    def _format_messages(self, intervention_type: str, values: Dict[str, Any]) -> List:
+        """Render the chat messages for an intervention type"""
+        template = self._human_templates.get(
+            intervention_type, self._human_templates[InterventionType.ENCOURAGEMENT]
+        )
+        return [self.base_system_msg, HumanMessage(content=template.format_map(values))]
     
     def _build_prompt_values(
         self, 
@@ -203,32 +369,38 @@ Generate a brief message explaining the adjustment in a positive way.""")
     
     async def _invoke_llm(
         self, 
-        prompt: ChatPromptTemplate,
-        values: Dict[str, Any],
+        messages: List,
         intervention_type: str
     ) -> str:
         """Invoke LLM to generate message"""
         try:
-            messages = prompt.format_messages(**values)
             response = await self.llm.ainvoke(messages)
-            
-            # Extract text content
-            if hasattr(response, 'content'):
-                message = response.content.strip()
-            else:
-                message = str(response).strip()
-            
-            # Remove quotes if LLM wrapped the message
-            if message.startswith('"') and message.endswith('"'):
-                message = message[1:-1]
+            message = self._extract_message(response)
             
             self.logger.info(f"Generated message for {intervention_type}: {message[:50]}...")
             return message
             
         except Exception as e:
-            self.logger.error(f"LLM invocation failed: {e}", exc_info=True)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"LLM invocation failed: {e}", exc_info=True)
+            else:
+                self.logger.warning(f"LLM invocation failed: {e}")
             raise
     
+    @staticmethod
+    def _extract_message(response) -> str:
+        """Extract the message text from an LLM response"""
+        if hasattr(response, 'content'):
+            message = response.content.strip()
+        else:
+            message = str(response).strip()
+        
+        # Remove quotes if LLM wrapped the message
+        if message.startswith('"') and message.endswith('"'):
+            message = message[1:-1]
+        
+        return message
+    
     def _get_cache_key(
         self,
         intervention_type: str,
@@ -236,32 +408,42 @@ Generate a brief message explaining the adjustment in a positive way.""")
         student_profile: Dict[str, Any]
     ) -> str:
         """Generate cache key for message"""
-        # Create a deterministic hash of the context
-        context_str = json.dumps({
-            "type": intervention_type,
-            "cognitive_load": context.get("cognitive_load", 0) // 10 * 10,  # Round to nearest 10
-            "quiz_accuracy": context.get("quiz_accuracy", 0) // 10 * 10,
-            "mood_score": round(context.get("mood_score", 0), 1),
-            "student_id": student_profile.get("student_id", "unknown")
-        }, sort_keys=True)
+        # Create a deterministic hash of the bucketed context; the tuple repr is
+        # stable across processes and skips JSON encoding
+        context_str = repr((
+            getattr(intervention_type, "value", intervention_type),
+            context.get("cognitive_load", 0) // 10 * 10,  # Round to nearest 10
+            context.get("quiz_accuracy", 0) // 10 * 10,
+            round(context.get("mood_score", 0), 1),
+            student_profile.get("student_id", "unknown"),
+        ))
         
-        context_hash = hashlib.md5(context_str.encode()).hexdigest()[:12]
+        # Non-cryptographic use: the digest only needs to spread cache keys
+        context_hash = hashlib.blake2b(context_str.encode(), digest_size=6).hexdigest()
         return f"intervention_msg:{intervention_type}:{context_hash}"
     
     async def _get_cached_message(self, cache_key: str) -> str:
         """Retrieve cached message from Redis"""
         try:
-            cached = redis_client.client.get(cache_key)
+            cached = await redis_client.cache_client.get(cache_key)
             if cached:
-                return cached.decode('utf-8') if isinstance(cached, bytes) else cached
+                return cached
         except Exception as e:
             self.logger.warning(f"Cache retrieval failed: {e}")
         return None
     
+    async def _get_cached_messages(self, cache_keys: List[str]) -> List[Optional[str]]:
+        """Retrieve several cached messages from Redis in one MGET"""
+        try:
+            return await redis_client.cache_client.mget(cache_keys)
+        except Exception as e:
+            self.logger.warning(f"Cache retrieval failed: {e}")
+        return [None] * len(cache_keys)
+    
     async def _cache_message(self, cache_key: str, message: str):
         """Cache message in Redis"""
         try:
-            redis_client.client.setex(
+            await redis_client.cache_client.setex(
                 cache_key,
                 settings.INTERVENTION_MESSAGE_CACHE_TTL_SECONDS,
                 message
@@ -269,22 +451,44 @@ Generate a brief message explaining the adjustment in a positive way.""")
         except Exception as e:
             self.logger.warning(f"Cache storage failed: {e}")
     
+    async def _cache_messages(self, messages: Dict[str, str]):
+        """Cache several messages in Redis with one pipeline round trip"""
+        try:
+            pipe = redis_client.cache_client.pipeline(transaction=False)
+            for cache_key, message in messages.items():
+                pipe.setex(cache_key, settings.INTERVENTION_MESSAGE_CACHE_TTL_SECONDS, message)
+            await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Cache storage failed: {e}")
+    
+    async def _get_semantic_message(self, semantic_cache: Any, summary: str) -> Optional[str]:
+        """Retrieve the closest cached message for a prompt summary"""
+        try:
+            hits = await asyncio.to_thread(semantic_cache.check, prompt=summary, num_results=1)
+            if hits:
+                return hits[0]["response"]
+        except Exception as e:
+            self.logger.warning(f"Semantic cache retrieval failed: {e}")
+        return None
+    
+    async def _cache_semantic_message(
+        self,
+        semantic_cache: Any,
+        summary: str,
+        message: str,
+        intervention_type: str
+    ):
+        """Store a generated message in the semantic cache"""
+        try:
+            await asyncio.to_thread(
+                semantic_cache.store,
+                prompt=summary,
+                response=message,
+                metadata={"intervention_type": getattr(intervention_type, "value", intervention_type)},
+            )
+        except Exception as e:
+            self.logger.warning(f"Semantic cache storage failed: {e}")
+    
     def _get_fallback_message(self, intervention_type: str) -> str:
         """Get fallback template message if LLM fails"""
-        fallback_messages = {
-            InterventionType.BREAK_SUGGESTION: 
-                "You've been working hard! Consider taking a 5-minute break to recharge.",
-            
-            InterventionType.TOPIC_SWITCH: 
-                "This topic seems challenging. Let's try a different approach or review the basics first.",
-            
-            InterventionType.RECAP_PROMPT: 
-                "Let's review some key concepts before moving forward. Mastering the fundamentals will help you succeed.",
-            
-            InterventionType.ENCOURAGEMENT: 
-                "You're making progress! Learning takes time and effort. Keep going, you're doing great!",
-            
-            InterventionType.DIFFICULTY_ADJUSTMENT: 
-                "We're adjusting the pace to better match your learning style. This will help you build confidence.",
-        }
-        return fallback_messages.get(intervention_type, "Keep up the great work!")
+        return _FALLBACK_MESSAGES.get(intervention_type, "Keep up the great work!")
@@ -8,11 +8,11 @@ Background tasks for CLR system maintenance:
 """
 
 import asyncio
-from datetime import datetime, time
-from typing import Dict, List
+from datetime import datetime, time, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 import logging
 
-from services.clr_storage import clr_storage_service
+from services.clr_storage import clr_storage_service, ACTIVE_STUDENTS_KEY
 from config.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
@@ -21,6 +21,18 @@ logger = logging.getLogger(__name__)
 class CLRMaintenanceService:
     """Service for background maintenance tasks."""
     
+    # (task method, hour, weekday or None for daily)
+    _SCHEDULE = (
+        ("update_baselines_task", 2, None),  # Daily at 2 AM
+        ("cleanup_old_data_task", 3, None),  # Daily at 3 AM
+        ("generate_weekly_reports_task", 0, 6),  # Sunday at midnight
+        ("rebuild_active_students_task", 4, 6),  # Sunday at 4 AM
+    )
+    MISFIRE_GRACE_SECONDS = 3600  # Late runs within this window still execute
+    SCAN_BATCH_SIZE = 500  # Keys per SCAN/SSCAN call and per pipeline flush
+    MAX_CONCURRENCY = 8  # Concurrent per-student workers, kept under the Redis pool size
+    STUDENT_QUEUE_SIZE = 1000  # Student IDs buffered between SCAN and the workers
+    
     def __init__(self):
         self.tasks: List[asyncio.Task] = []
         self.is_running = False
@@ -35,9 +47,7 @@ class CLRMaintenanceService:
         logger.info("🔧 Starting CLR maintenance service")
         
         # Schedule tasks
-        self.tasks.append(asyncio.create_task(self._daily_baseline_update_scheduler()))
-        self.tasks.append(asyncio.create_task(self._daily_cleanup_scheduler()))
-        self.tasks.append(asyncio.create_task(self._weekly_report_scheduler()))
+        self.tasks.append(asyncio.create_task(self._scheduler()))
     
     async def stop(self):
         """Stop all maintenance tasks."""
@@ -50,96 +60,62 @@ class CLRMaintenanceService:
         await asyncio.gather(*self.tasks, return_exceptions=True)
         self.tasks.clear()
     
-    async def _daily_baseline_update_scheduler(self):
-        """Schedule baseline updates to run daily at 2 AM."""
-        while self.is_running:
-            try:
-                # Calculate time until next 2 AM
-                now = datetime.now()
-                target_time = datetime.combine(now.date(), time(2, 0))
-                
-                # If it's past 2 AM today, schedule for tomorrow
-                if now >= target_time:
-                    from datetime import timedelta
-                    target_time += timedelta(days=1)
-                
-                # Wait until target time
-                wait_seconds = (target_time - now).total_seconds()
-                logger.info(f"⏰ Next baseline update in {wait_seconds / 3600:.1f} hours")
-                
-                await asyncio.sleep(wait_seconds)
-                
-                # Run baseline update task
-                await self.update_baselines_task()
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in baseline update scheduler: {e}")
-                # Wait 1 hour before retrying
-                await asyncio.sleep(3600)
-    
-    async def _daily_cleanup_scheduler(self):
-        """Schedule cleanup to run daily at 3 AM."""
+    async def _scheduler(self):
+        """Run each maintenance task at its next scheduled time from one loop."""
+        # Backfill the active-student set on first deploy or after it was lost
+        try:
+            if not await redis_client.data_client.exists(ACTIVE_STUDENTS_KEY):
+                await self.rebuild_active_students_task()
+        except Exception as e:
+            logger.error(f"Active student set check failed: {e}")
+        
+        now = datetime.now()
+        next_runs = {
+            name: self._next_run_time(now, hour, weekday)
+            for name, hour, weekday in self._SCHEDULE
+        }
+        schedule = {name: (hour, weekday) for name, hour, weekday in self._SCHEDULE}
+        
         while self.is_running:
             try:
-                # Calculate time until next 3 AM
-                now = datetime.now()
-                target_time = datetime.combine(now.date(), time(3, 0))
+                # Wait for the earliest due task
+                name = min(next_runs, key=next_runs.get)
+                scheduled_time = next_runs[name]
+                # Compare as timestamps: naive local datetimes differ by an
+                # extra/missing hour across a DST change
+                wait_seconds = scheduled_time.timestamp() - datetime.now().timestamp()
+                logger.info(f"⏰ Next {name} in {wait_seconds / 3600:.1f} hours")
                 
-                # If it's past 3 AM today, schedule for tomorrow
-                if now >= target_time:
-                    from datetime import timedelta
-                    target_time += timedelta(days=1)
+                if wait_seconds > 0:
+                    await asyncio.sleep(wait_seconds)
                 
-                # Wait until target time
-                wait_seconds = (target_time - now).total_seconds()
-                logger.info(f"⏰ Next cleanup in {wait_seconds / 3600:.1f} hours")
+                # Advance from the scheduled time so runs don't drift
+                next_runs[name] = self._next_run_time(scheduled_time, *schedule[name])
                 
-                await asyncio.sleep(wait_seconds)
+                # Skip runs delayed past the grace period by an earlier long task
+                if -wait_seconds > self.MISFIRE_GRACE_SECONDS:
+                    logger.warning(f"Skipping missed {name} scheduled for {scheduled_time}")
+                    continue
                 
-                # Run cleanup task
-                await self.cleanup_old_data_task()
+                await getattr(self, name)()
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in cleanup scheduler: {e}")
-                # Wait 1 hour before retrying
-                await asyncio.sleep(3600)
+                logger.error(f"Error in maintenance scheduler: {e}")
     
-    async def _weekly_report_scheduler(self):
-        """Schedule weekly reports to run on Sunday at midnight."""
-        while self.is_running:
-            try:
-                # Calculate time until next Sunday midnight
-                now = datetime.now()
-                days_until_sunday = (6 - now.weekday()) % 7
-                
-                if days_until_sunday == 0 and now.hour >= 0:
-                    days_until_sunday = 7
-                
-                from datetime import timedelta
-                target_time = datetime.combine(
-                    now.date() + timedelta(days=days_until_sunday),
-                    time(0, 0)
-                )
-                
-                # Wait until target time
-                wait_seconds = (target_time - now).total_seconds()
-                logger.info(f"⏰ Next weekly report in {wait_seconds / 86400:.1f} days")
-                
-                await asyncio.sleep(wait_seconds)
-                
-                # Run weekly report task
-                await self.generate_weekly_reports_task()
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in weekly report scheduler: {e}")
-                # Wait 1 day before retrying
-                await asyncio.sleep(86400)
+    @staticmethod
+    def _next_run_time(after: datetime, hour: int, weekday: Optional[int]) -> datetime:
+        """Next datetime strictly after `after` at `hour`, on `weekday` if given."""
+        target = datetime.combine(after.date(), time(hour, 0))
+        if weekday is None:
+            if target <= after:
+                target += timedelta(days=1)
+        else:
+            target += timedelta(days=(weekday - after.weekday()) % 7)
+            if target <= after:
+                target += timedelta(days=7)
+        return target
     
     async def update_baselines_task(self):
         """
@@ -149,33 +125,13 @@ class CLRMaintenanceService:
         logger.info("🔄 Starting baseline update task")
         
         try:
-            # Get list of all students with CLR data
-            # This would require querying Redis for all clr:* keys
-            # For now, use a placeholder implementation
-            
             updated_count = 0
             error_count = 0
             
-            # Example: Get students from Redis pattern scan
-            cursor = 0
-            student_ids = set()
-            
-            while True:
-                cursor, keys = redis_client.scan(cursor, match="clr:*", count=100)
-                for key in keys:
-                    # Extract student_id from key pattern "clr:{student_id}"
-                    student_id = key.decode('utf-8').split(':', 1)[1] if isinstance(key, bytes) else key.split(':', 1)[1]
-                    student_ids.add(student_id)
-                
-                if cursor == 0:
-                    break
-            
-            logger.info(f"Found {len(student_ids)} students with CLR data")
-            
-            # Update baseline for each student
-            for student_id in student_ids:
+            async def update_one(student_id: str):
+                nonlocal updated_count, error_count
                 try:
-                    baseline = clr_storage_service.calculate_baseline_metrics(student_id, days=7)
+                    await clr_storage_service.calculate_baseline_metrics(student_id, days=7)
                     updated_count += 1
                     
                     if updated_count % 100 == 0:
@@ -185,6 +141,9 @@ class CLRMaintenanceService:
                     logger.error(f"Error updating baseline for student {student_id}: {e}")
                     error_count += 1
             
+            # Stream active students to the workers
+            await self._for_each_student(update_one)
+            
             logger.info(f"✅ Baseline update complete: {updated_count} updated, {error_count} errors")
             
         except Exception as e:
@@ -198,37 +157,42 @@ class CLRMaintenanceService:
         logger.info("🧹 Starting cleanup task")
         
         try:
-            from datetime import timedelta
-            
             # Calculate cutoff time (30 days ago)
             cutoff_time = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
             
             cleaned_count = 0
+            key_count = 0
+            inactive_count = 0
             
-            # Get all CLR keys
-            cursor = 0
-            clr_keys = []
-            
-            while True:
-                cursor, keys = redis_client.scan(cursor, match="clr:*", count=100)
-                clr_keys.extend(keys)
+            # Remove entries older than cutoff, one pipeline round trip per SSCAN batch
+            async for student_ids in self._active_student_batches():
+                pipe = redis_client.data_client.pipeline(transaction=False)
+                for student_id in student_ids:
+                    pipe.zremrangebyscore(f"clr:{student_id}", '-inf', cutoff_time)
+                    pipe.zcard(f"clr:{student_id}")
+                results = await pipe.execute(raise_on_error=False)
                 
-                if cursor == 0:
-                    break
-            
-            logger.info(f"Found {len(clr_keys)} CLR keys to check")
-            
-            # Clean old entries from each key
-            for key in clr_keys:
-                try:
-                    # Remove entries older than cutoff
-                    removed = redis_client.zremrangebyscore(key, '-inf', cutoff_time)
+                # Two replies (ZREMRANGEBYSCORE, ZCARD) per student
+                inactive = []
+                for i, student_id in enumerate(student_ids):
+                    removed, remaining = results[2 * i:2 * i + 2]
+                    if isinstance(removed, Exception):
+                        logger.error(f"Error cleaning key clr:{student_id}: {removed}")
+                        continue
                     cleaned_count += removed
-                    
-                except Exception as e:
-                    logger.error(f"Error cleaning key {key}: {e}")
+                    if remaining == 0:
+                        # Series emptied or expired; the next write re-registers it
+                        inactive.append(student_id)
+                
+                if inactive:
+                    await redis_client.data_client.srem(ACTIVE_STUDENTS_KEY, *inactive)
+                    inactive_count += len(inactive)
+                key_count += len(student_ids)
             
-            logger.info(f"✅ Cleanup complete: Removed {cleaned_count} old entries from Redis")
+            logger.info(
+                f"✅ Cleanup complete: Removed {cleaned_count} old entries from {key_count} Redis keys, "
+                f"{inactive_count} inactive students"
+            )
             
             # TODO: Implement PostgreSQL compression for data older than 90 days
             
@@ -243,61 +207,155 @@ class CLRMaintenanceService:
         logger.info("📊 Starting weekly report generation")
         
         try:
-            from datetime import timedelta
-            
             # Get all students with CLR data from past week
             week_ago = datetime.now() - timedelta(days=7)
             
             report_count = 0
             
-            # Get student IDs
-            cursor = 0
-            student_ids = set()
+            # Reports waiting to be written, flushed in pipelines of SCAN_BATCH_SIZE
+            pending_reports: List[tuple] = []
             
-            while True:
-                cursor, keys = redis_client.scan(cursor, match="clr:*", count=100)
-                for key in keys:
-                    student_id = key.decode('utf-8').split(':', 1)[1] if isinstance(key, bytes) else key.split(':', 1)[1]
-                    student_ids.add(student_id)
+            async def flush_reports():
+                nonlocal report_count
+                batch = pending_reports.copy()
+                pending_reports.clear()
                 
-                if cursor == 0:
-                    break
-            
-            logger.info(f"Generating reports for {len(student_ids)} students")
+                # Store reports as Redis hashes with 30-day TTL
+                pipe = redis_client.data_client.pipeline(transaction=False)
+                for report_key, report in batch:
+                    pipe.hset(report_key, mapping=self._report_hash_fields(report))
+                    pipe.expire(report_key, 30 * 24 * 60 * 60)
+                results = await pipe.execute(raise_on_error=False)
+                
+                # Two replies (HSET, EXPIRE) per report
+                for i, (report_key, _) in enumerate(batch):
+                    error = next(
+                        (r for r in results[2 * i:2 * i + 2] if isinstance(r, Exception)), None
+                    )
+                    if error is not None:
+                        logger.error(f"Error storing report {report_key}: {error}")
+                    else:
+                        report_count += 1
             
-            # Generate report for each student
-            for student_id in student_ids:
+            async def report_one(student_id: str):
                 try:
                     # Get week's data
-                    history_data = clr_storage_service.get_cognitive_load_history(
+                    history_data = await clr_storage_service.get_cognitive_load_history(
                         student_id, 'last_week'
                     )
                     
                     if not history_data.get('history'):
-                        continue
+                        return
                     
                     # Generate summary report
                     report = self._generate_student_report(student_id, history_data)
-                    
-                    # Store report in Redis with 30-day TTL
                     report_key = f"clr_report:{student_id}:{datetime.now().strftime('%Y-%m-%d')}"
-                    import json
-                    redis_client.setex(
-                        report_key,
-                        30 * 24 * 60 * 60,
-                        json.dumps(report)
-                    )
+                    pending_reports.append((report_key, report))
                     
-                    report_count += 1
+                    if len(pending_reports) >= self.SCAN_BATCH_SIZE:
+                        await flush_reports()
                     
                 except Exception as e:
                     logger.error(f"Error generating report for student {student_id}: {e}")
             
-            logger.info(f"✅ Weekly reports generated: {report_count} reports")
+            # Stream active students to the workers
+            student_count = await self._for_each_student(report_one)
+            if pending_reports:
+                await flush_reports()
+            
+            logger.info(f"✅ Weekly reports generated: {report_count} reports for {student_count} students")
             
         except Exception as e:
             logger.error(f"Weekly report task failed: {e}")
     
+    async def rebuild_active_students_task(self):
+        """
+        Re-register every student with a CLR time series in the active set.
+        Runs weekly on Sunday at 4 AM, and at startup if the set is missing.
+        """
+        logger.info("🗂️ Rebuilding active student set")
+        
+        try:
+            student_count = 0
+            
+            # The only full keyspace SCAN; other tasks read the set
+            async for keys in self._batched(
+                redis_client.data_client.scan_iter(match="clr:*", count=self.SCAN_BATCH_SIZE)
+            ):
+                await redis_client.data_client.sadd(
+                    ACTIVE_STUDENTS_KEY, *(key.partition(':')[2] for key in keys)
+                )
+                student_count += len(keys)
+            
+            logger.info(f"✅ Active student set rebuilt: {student_count} keys scanned")
+            
+        except Exception as e:
+            logger.error(f"Active student rebuild failed: {e}")
+    
+    async def _batched(self, items: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+        """Group an async iterator into lists of SCAN_BATCH_SIZE."""
+        batch = []
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= self.SCAN_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _active_student_batches(self) -> AsyncIterator[List[str]]:
+        """Yield active student IDs in batches of SCAN_BATCH_SIZE."""
+        return self._batched(
+            redis_client.data_client.sscan_iter(ACTIVE_STUDENTS_KEY, count=self.SCAN_BATCH_SIZE)
+        )
+    
+    async def _for_each_student(self, process: Callable[[str], Awaitable[None]]) -> int:
+        """
+        Stream active student IDs through MAX_CONCURRENCY workers.
+        
+        The SSCAN producer feeds a bounded queue, so IDs are never collected
+        up front and scanning overlaps with processing. `process` is expected
+        to handle its own errors.
+        
+        Returns:
+            Number of distinct students processed
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.STUDENT_QUEUE_SIZE)
+        
+        async def produce() -> int:
+            # SSCAN may return a member more than once
+            seen = set()
+            try:
+                async for student_ids in self._active_student_batches():
+                    for student_id in student_ids:
+                        if student_id not in seen:
+                            seen.add(student_id)
+                            await queue.put(student_id)
+            finally:
+                for _ in range(self.MAX_CONCURRENCY):
+                    await queue.put(None)
+            return len(seen)
+        
+        async def consume():
+            while True:
+                student_id = await queue.get()
+                if student_id is None:
+                    break
+                await process(student_id)
+        
+        student_count, *_ = await asyncio.gather(
+            produce(), *(consume() for _ in range(self.MAX_CONCURRENCY))
+        )
+        return student_count
+    
+    @staticmethod
+    def _report_hash_fields(report: Dict) -> Dict:
+        """Flatten a report into Redis hash fields (booleans stored as 0/1)."""
+        return {
+            field: int(value) if isinstance(value, bool) else value
+            for field, value in report.items()
+        }
+    
     def _generate_student_report(self, student_id: str, history_data: Dict) -> Dict:
         """Generate summary report from history data."""
         stats = history_data.get('statistics', {})
@@ -9,13 +9,16 @@ Tracks and monitors CLR Agent performance metrics:
 """
 
 import time
-from typing import Dict, List
-from collections import defaultdict
+from typing import Dict, List, Optional
+from collections import Counter, deque
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Repeated get_metrics calls within this window share one computed dict
+METRICS_CACHE_TTL_SECONDS = 1.0
+
 
 class CLRMonitoringService:
     """Service for monitoring CLR Agent performance."""
@@ -28,7 +31,7 @@ class CLRMonitoringService:
         self.last_execution_time = None
         
         # Pattern detection metrics
-        self.pattern_detections = defaultdict(int)
+        self.pattern_detections = Counter()
         self.total_patterns_detected = 0
         
         # LLM metrics
@@ -38,12 +41,18 @@ class CLRMonitoringService:
         self.llm_total_cost = 0.0  # Estimated cost in USD
         
         # Performance tracking
-        self.execution_times: List[float] = []
+        self.execution_times: deque = deque(maxlen=1000)  # Last 1000 execution times
+        self._recent_times: deque = deque(maxlen=100)  # Window for the recent average
+        self._recent_sum = 0.0
         self.max_execution_time = 0.0
         self.min_execution_time = float('inf')
         
         # Service start time
         self.start_time = datetime.now()
+        
+        # Last get_metrics result and when it was computed (monotonic clock)
+        self._metrics_cache: Optional[Dict] = None
+        self._metrics_cache_time = 0.0
     
     def record_execution(self, duration_ms: float, success: bool = True, patterns: List[str] = None):
         """
@@ -61,9 +70,11 @@ class CLRMonitoringService:
         self.total_execution_time += duration_seconds
         self.execution_times.append(duration_seconds)
         
-        # Keep only last 1000 execution times
-        if len(self.execution_times) > 1000:
-            self.execution_times.pop(0)
+        # Running sum over the recent window, updated as the oldest time drops out
+        if len(self._recent_times) == self._recent_times.maxlen:
+            self._recent_sum -= self._recent_times[0]
+        self._recent_times.append(duration_seconds)
+        self._recent_sum += duration_seconds
         
         # Update min/max
         self.max_execution_time = max(self.max_execution_time, duration_seconds)
@@ -79,6 +90,7 @@ class CLRMonitoringService:
                 self.pattern_detections[pattern] += 1
                 self.total_patterns_detected += 1
         
+        self._metrics_cache = None
         logger.debug(f"CLR execution recorded: {duration_ms:.2f}ms, success={success}")
     
     def record_llm_call(self, success: bool = True, cached: bool = False, cost: float = 0.0):
@@ -99,11 +111,22 @@ class CLRMonitoringService:
             self.llm_errors += 1
         
         self.llm_total_cost += cost
+        self._metrics_cache = None
         
         logger.debug(f"LLM call recorded: success={success}, cached={cached}, cost=${cost:.4f}")
     
     def get_metrics(self) -> Dict:
         """Get comprehensive monitoring metrics."""
+        now = time.monotonic()
+        if self._metrics_cache is not None and now - self._metrics_cache_time < METRICS_CACHE_TTL_SECONDS:
+            return self._metrics_cache
+        
+        self._metrics_cache = self._compute_metrics()
+        self._metrics_cache_time = now
+        return self._metrics_cache
+    
+    def _compute_metrics(self) -> Dict:
+        """Build the monitoring metrics dict."""
         uptime_seconds = (datetime.now() - self.start_time).total_seconds()
         
         # Calculate average execution time
@@ -134,12 +157,8 @@ class CLRMonitoringService:
             else 0.0
         )
         
-        # Get top patterns
-        top_patterns = sorted(
-            self.pattern_detections.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        # Get top patterns (partial heap selection instead of a full sort)
+        top_patterns = self.pattern_detections.most_common(5)
         
         return {
             'uptime_seconds': uptime_seconds,
@@ -181,11 +200,10 @@ class CLRMonitoringService:
     
     def _calculate_recent_average(self) -> float:
         """Calculate average of last 100 execution times."""
-        if not self.execution_times:
+        if not self._recent_times:
             return 0.0
         
-        recent_times = self.execution_times[-100:]
-        return sum(recent_times) / len(recent_times)
+        return self._recent_sum / len(self._recent_times)
     
     def get_health_status(self) -> Dict:
         """Get health status for health check endpoint."""
@@ -237,10 +255,13 @@ class CLRMonitoringService:
         self.llm_total_cost = 0.0
         
         self.execution_times.clear()
+        self._recent_times.clear()
+        self._recent_sum = 0.0
         self.max_execution_time = 0.0
         self.min_execution_time = float('inf')
         
         self.start_time = datetime.now()
+        self._metrics_cache = None
 
 
 # Singleton instance
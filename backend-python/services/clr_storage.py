@@ -11,11 +11,84 @@ import json
 import asyncio
 from collections import deque
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 from config.redis_client import redis_client
 from config.database import get_db
 from sqlalchemy.orm import Session
 
 
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+# Members stay JSON (compact, UTF-8) so cjson in the baseline script can decode them
+_json_dumps = orjson.dumps if ORJSON_AVAILABLE else (
+    lambda obj: json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+)
+
+
+# Set of student IDs with a CLR time series, kept outside the clr:* keyspace so
+# pattern scans over the sorted sets never see it
+ACTIVE_STUDENTS_KEY = "clr_active_students"
+
+
+# Aggregates a student's CLR samples server-side so only the statistics cross
+# the wire. Members are JSON payloads (the sorted-set score is the timestamp);
+# undecodable members are skipped. Replies with [count] when there is no data,
+# otherwise [count, mean, std, min, max, median, pattern, n, pattern, n, ...]
+# with floats as %.17g strings (Lua numbers become truncated integer replies)
+# and patterns in first-seen order.
+_BASELINE_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], '+inf')
+local scores, pattern_names, pattern_counts = {}, {}, {}
+local sum = 0
+for _, member in ipairs(members) do
+    local ok, data = pcall(cjson.decode, member)
+    if ok and type(data) == 'table' then
+        local score = tonumber(data['score']) or 0
+        scores[#scores + 1] = score
+        sum = sum + score
+        if type(data['patterns']) == 'table' then
+            for _, pattern in ipairs(data['patterns']) do
+                if pattern_counts[pattern] == nil then
+                    pattern_names[#pattern_names + 1] = pattern
+                    pattern_counts[pattern] = 0
+                end
+                pattern_counts[pattern] = pattern_counts[pattern] + 1
+            end
+        end
+    end
+end
+local n = #scores
+if n == 0 then
+    return {0}
+end
+local mean = sum / n
+local std = 0
+if n > 1 then
+    local squares = 0
+    for _, score in ipairs(scores) do
+        squares = squares + (score - mean) ^ 2
+    end
+    std = math.sqrt(squares / (n - 1))
+end
+table.sort(scores)
+local reply = {n}
+for _, value in ipairs({mean, std, scores[1], scores[n], scores[math.floor(n / 2) + 1]}) do
+    reply[#reply + 1] = string.format('%.17g', value)
+end
+for _, pattern in ipairs(pattern_names) do
+    reply[#reply + 1] = pattern
+    reply[#reply + 1] = pattern_counts[pattern]
+end
+return reply
+"""
+
+
 class CLRStorageService:
     """Service for managing cognitive load time-series data."""
     
@@ -24,6 +97,8 @@ class CLRStorageService:
         self.last_flush_time = datetime.now()
         self.flush_threshold = 10  # Flush after 10 entries
         self.flush_interval_seconds = 300  # Or after 5 minutes
+        self._baseline_script = None
+        self._baseline_script_client = None
         
     async def store_cognitive_load(self, student_id: str, session_id: str, clr_data: Dict):
         """
@@ -38,7 +113,7 @@ class CLRStorageService:
         
         # Store in Redis sorted set
         redis_key = f"clr:{student_id}"
-        redis_value = json.dumps({
+        redis_value = _json_dumps({
             'session_id': session_id,
             'score': clr_data.get('cognitive_load_score', 0),
             'fatigue_level': clr_data.get('mental_fatigue_level', 'low'),
@@ -47,10 +122,15 @@ class CLRStorageService:
             'timestamp': timestamp
         })
         
-        await redis_client.data_client.zadd(redis_key, {redis_value: timestamp})
+        pipe = redis_client.data_client.pipeline(transaction=False)
+        pipe.zadd(redis_key, {redis_value: timestamp})
         
         # Set TTL of 30 days
-        await redis_client.data_client.expire(redis_key, 30 * 24 * 60 * 60)
+        pipe.expire(redis_key, 30 * 24 * 60 * 60)
+        
+        # Register the student for maintenance tasks
+        pipe.sadd(ACTIVE_STUDENTS_KEY, student_id)
+        await pipe.execute()
         
         # Add to batch buffer for PostgreSQL
         self.batch_buffer.append({
@@ -132,7 +212,7 @@ class CLRStorageService:
         
         for value, timestamp in results:
             try:
-                data = json.loads(value)
+                data = _json_loads(value)
                 score = data.get('score', 0)
                 history.append({
                     'timestamp': int(timestamp),
@@ -255,39 +335,28 @@ class CLRStorageService:
         Returns:
             Baseline metrics dictionary
         """
-        # Get history for specified days
+        # Aggregate the history for specified days inside Redis
         cutoff_time = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
         redis_key = f"clr:{student_id}"
-        results = await redis_client.data_client.zrangebyscore(redis_key, cutoff_time, '+inf')
+        reply = await self._get_baseline_script()(keys=[redis_key], args=[cutoff_time])
         
-        if not results:
+        data_points = int(reply[0])
+        if not data_points:
             return self._default_baseline()
         
-        scores = []
-        patterns_count = {}
-        
-        for value in results:
-            try:
-                data = json.loads(value)
-                scores.append(data.get('score', 0))
-                
-                for pattern in data.get('patterns', []):
-                    patterns_count[pattern] = patterns_count.get(pattern, 0) + 1
-            except json.JSONDecodeError:
-                continue
-        
-        if not scores:
-            return self._default_baseline()
+        avg_load, std_load, min_load, max_load, median_load = (float(v) for v in reply[1:6])
+        pattern_fields = reply[6:]
+        patterns_count = dict(zip(pattern_fields[::2], (int(n) for n in pattern_fields[1::2])))
         
         # Calculate baseline statistics
         baseline = {
-            'avg_cognitive_load': sum(scores) / len(scores),
-            'std_cognitive_load': self._calculate_std(scores),
-            'min_load': min(scores),
-            'max_load': max(scores),
-            'median_load': sorted(scores)[len(scores) // 2],
+            'avg_cognitive_load': avg_load,
+            'std_cognitive_load': std_load,
+            'min_load': min_load,
+            'max_load': max_load,
+            'median_load': median_load,
             'common_patterns': sorted(patterns_count.items(), key=lambda x: x[1], reverse=True)[:5],
-            'data_points': len(scores),
+            'data_points': data_points,
             'days_analyzed': days,
             'calculated_at': datetime.now().isoformat()
         }
@@ -303,14 +372,14 @@ class CLRStorageService:
         
         return baseline
     
-    def _calculate_std(self, values: List[float]) -> float:
-        """Calculate standard deviation."""
-        if len(values) < 2:
-            return 0.0
-        
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
-        return variance ** 0.5
+    def _get_baseline_script(self):
+        """Get the baseline aggregation script registered on the current data client."""
+        # Re-register after a reconnect; the script object runs EVALSHA and
+        # loads the script on NOSCRIPT
+        if self._baseline_script_client is not redis_client.data_client:
+            self._baseline_script = redis_client.data_client.register_script(_BASELINE_SCRIPT)
+            self._baseline_script_client = redis_client.data_client
+        return self._baseline_script
     
     def _default_baseline(self) -> Dict:
         """Return default baseline when no data exists."""
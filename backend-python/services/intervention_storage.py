@@ -12,6 +12,70 @@ import logging
 from sqlalchemy import text
 from config.database import get_async_db
 
+# Statements are built once at import and reused for every call
+STORE_INTERVENTION_QUERY = text("""
+    INSERT INTO interventions (
+        "studentId", "sessionId", "interventionType",
+        priority, message, context, "deliveredAt"
+    )
+    VALUES (
+        :student_id, :session_id, :intervention_type,
+        :priority, :message, :context::jsonb, :delivered_at
+    )
+    RETURNING id
+""")
+
+INTERVENTION_HISTORY_BY_TYPE_QUERY = text("""
+    SELECT 
+        id, "studentId", "sessionId", "interventionType",
+        priority, message, context, "deliveredAt",
+        "acknowledgedAt", effectiveness, outcome
+    FROM interventions
+    WHERE "studentId" = :student_id
+      AND "deliveredAt" >= :since_date
+      AND "interventionType" = :intervention_type
+    ORDER BY "deliveredAt" DESC
+""")
+
+INTERVENTION_HISTORY_QUERY = text("""
+    SELECT 
+        id, "studentId", "sessionId", "interventionType",
+        priority, message, context, "deliveredAt",
+        "acknowledgedAt", effectiveness, outcome
+    FROM interventions
+    WHERE "studentId" = :student_id
+      AND "deliveredAt" >= :since_date
+    ORDER BY "deliveredAt" DESC
+""")
+
+UPDATE_EFFECTIVENESS_QUERY = text("""
+    UPDATE interventions
+    SET effectiveness = :effectiveness,
+        outcome = :outcome
+    WHERE id = :intervention_id
+""")
+
+ACKNOWLEDGE_INTERVENTION_QUERY = text("""
+    UPDATE interventions
+    SET "acknowledgedAt" = :acknowledged_at
+    WHERE id = :intervention_id
+""")
+
+EFFECTIVENESS_STATS_QUERY = text("""
+    SELECT 
+        "interventionType",
+        COUNT(*) as total_count,
+        COUNT("acknowledgedAt") as acknowledged_count,
+        AVG(effectiveness) as avg_effectiveness,
+        SUM(CASE WHEN outcome = 'improved' THEN 1 ELSE 0 END) as improved_count,
+        SUM(CASE WHEN outcome = 'no_change' THEN 1 ELSE 0 END) as no_change_count,
+        SUM(CASE WHEN outcome = 'declined' THEN 1 ELSE 0 END) as declined_count
+    FROM interventions
+    WHERE "studentId" = :student_id
+      AND "deliveredAt" >= NOW() - INTERVAL '30 days'
+    GROUP BY "interventionType"
+""")
+
 
 class InterventionStorageService:
     """Service for storing and retrieving intervention records"""
@@ -31,19 +95,7 @@ class InterventionStorageService:
         """
         try:
             async for db in get_async_db():
-                query = text("""
-                    INSERT INTO interventions (
-                        "studentId", "sessionId", "interventionType",
-                        priority, message, context, "deliveredAt"
-                    )
-                    VALUES (
-                        :student_id, :session_id, :intervention_type,
-                        :priority, :message, :context::jsonb, :delivered_at
-                    )
-                    RETURNING id
-                """)
-                
-                result = await db.execute(query, {
+                result = await db.execute(STORE_INTERVENTION_QUERY, {
                     "student_id": intervention_data["student_id"],
                     "session_id": intervention_data["session_id"],
                     "intervention_type": intervention_data["intervention_type"],
@@ -85,34 +137,13 @@ class InterventionStorageService:
                 since_date = datetime.now() - timedelta(days=days)
                 
                 if intervention_type:
-                    query = text("""
-                        SELECT 
-                            id, "studentId", "sessionId", "interventionType",
-                            priority, message, context, "deliveredAt",
-                            "acknowledgedAt", effectiveness, outcome
-                        FROM interventions
-                        WHERE "studentId" = :student_id
-                          AND "deliveredAt" >= :since_date
-                          AND "interventionType" = :intervention_type
-                        ORDER BY "deliveredAt" DESC
-                    """)
-                    result = await db.execute(query, {
+                    result = await db.execute(INTERVENTION_HISTORY_BY_TYPE_QUERY, {
                         "student_id": student_id,
                         "since_date": since_date,
                         "intervention_type": intervention_type
                     })
                 else:
-                    query = text("""
-                        SELECT 
-                            id, "studentId", "sessionId", "interventionType",
-                            priority, message, context, "deliveredAt",
-                            "acknowledgedAt", effectiveness, outcome
-                        FROM interventions
-                        WHERE "studentId" = :student_id
-                          AND "deliveredAt" >= :since_date
-                        ORDER BY "deliveredAt" DESC
-                    """)
-                    result = await db.execute(query, {
+                    result = await db.execute(INTERVENTION_HISTORY_QUERY, {
                         "student_id": student_id,
                         "since_date": since_date
                     })
@@ -157,14 +188,7 @@ class InterventionStorageService:
         """
         try:
             async for db in get_async_db():
-                query = text("""
-                    UPDATE interventions
-                    SET effectiveness = :effectiveness,
-                        outcome = :outcome
-                    WHERE id = :intervention_id
-                """)
-                
-                await db.execute(query, {
+                await db.execute(UPDATE_EFFECTIVENESS_QUERY, {
                     "intervention_id": intervention_id,
                     "effectiveness": effectiveness,
                     "outcome": outcome
@@ -190,13 +214,7 @@ class InterventionStorageService:
         """
         try:
             async for db in get_async_db():
-                query = text("""
-                    UPDATE interventions
-                    SET "acknowledgedAt" = :acknowledged_at
-                    WHERE id = :intervention_id
-                """)
-                
-                await db.execute(query, {
+                await db.execute(ACKNOWLEDGE_INTERVENTION_QUERY, {
                     "intervention_id": intervention_id,
                     "acknowledged_at": datetime.now()
                 })
@@ -221,22 +239,7 @@ class InterventionStorageService:
         """
         try:
             async for db in get_async_db():
-                query = text("""
-                    SELECT 
-                        "interventionType",
-                        COUNT(*) as total_count,
-                        COUNT("acknowledgedAt") as acknowledged_count,
-                        AVG(effectiveness) as avg_effectiveness,
-                        SUM(CASE WHEN outcome = 'improved' THEN 1 ELSE 0 END) as improved_count,
-                        SUM(CASE WHEN outcome = 'no_change' THEN 1 ELSE 0 END) as no_change_count,
-                        SUM(CASE WHEN outcome = 'declined' THEN 1 ELSE 0 END) as declined_count
-                    FROM interventions
-                    WHERE "studentId" = :student_id
-                      AND "deliveredAt" >= NOW() - INTERVAL '30 days'
-                    GROUP BY "interventionType"
-                """)
-                
-                result = await db.execute(query, {"student_id": student_id})
+                result = await db.execute(EFFECTIVENESS_STATS_QUERY, {"student_id": student_id})
                 rows = result.fetchall()
                 
                 stats = {}
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 from datetime import datetime
 from ml.cognitive_patterns import (
+    count_windows,
     CognitivePatternDetector,
     PatternFeatureExtractor,
     MentalStrainClassifier,
@@ -99,6 +100,18 @@ class TestPatternFeatureExtractor:
         assert 'unique_event_types' in features
         assert features['unique_event_types'] == 3
         assert 'total_transitions' in features
+    
+    def test_unsorted_events_are_ordered(self, feature_extractor):
+        """Test out-of-order events give the same features as ordered ones."""
+        events = [
+            {'timestamp': 1000, 'type': 'CLICK'},
+            {'timestamp': 61000, 'type': 'NAVIGATION'},
+            {'timestamp': 121000, 'type': 'IDLE'}
+        ]
+        
+        assert feature_extractor._is_sorted(events)
+        assert not feature_extractor._is_sorted(events[::-1])
+        assert feature_extractor.extract_features(events[::-1]) == feature_extractor.extract_features(events)
 
 
 class TestCognitivePatternDetector:
@@ -123,6 +136,14 @@ class TestCognitivePatternDetector:
         assert result['detected'] is False
         assert result['score'] == 0
     
+    def test_count_windows(self):
+        """Test sliding window counting, including the inclusive boundary."""
+        timestamps = [0, 1000, 2000, 5000, 5500, 6000]
+        
+        assert count_windows(timestamps, 3, 2000) == 2
+        assert count_windows(timestamps, 3, 1999) == 1
+        assert count_windows(timestamps, 7, 10000) == 0
+    
     def test_error_clustering_detection(self, pattern_detector, error_cluster_events):
         """Test error clustering detection."""
         result = pattern_detector._detect_error_clustering(error_cluster_events)
@@ -154,6 +175,16 @@ class TestCognitivePatternDetector:
         assert result['detected'] is True
         assert result['score'] == 80  # Peak degradation at 3 AM
     
+    def test_pattern_history_is_bounded(self, pattern_detector, rapid_switching_events):
+        """Test pattern history keeps only the most recent scores."""
+        features = {'hour_of_day': 12, 'is_night_hours': False}
+        for _ in range(pattern_detector.PATTERN_HISTORY_SIZE + 10):
+            pattern_detector.detect_patterns(rapid_switching_events, features)
+        
+        history = pattern_detector.pattern_history['task_switching']
+        assert len(history) == pattern_detector.PATTERN_HISTORY_SIZE
+        assert history[-1] > 0
+    
     def test_micro_break_analysis(self, pattern_detector):
         """Test micro-break pattern analysis."""
         events = [
@@ -198,6 +229,13 @@ class TestMentalStrainClassifier:
         
         assert result['mental_strain_score'] == 0
         assert len(result['detected_patterns']) == 0
+    
+    def test_temporal_decay(self, strain_classifier):
+        """Test temporal decay halves the score every half-life."""
+        assert strain_classifier.apply_temporal_decay(80, 0) == 80
+        assert strain_classifier.apply_temporal_decay(80, 15) == pytest.approx(40)
+        assert strain_classifier.apply_temporal_decay(80, 30) == pytest.approx(20)
+        assert strain_classifier.apply_temporal_decay(80, 600) < 0.01
 
 
 class TestHistoricalBaselineTracker:
@@ -10,11 +10,13 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pytest
+import asyncio
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 from agents.motivation_agent import MotivationAgent
 from motivation.intervention_rules import InterventionRuleEngine, InterventionTrigger
 from motivation.intervention_types import InterventionType, InterventionPriority
+from motivation.message_batching import BatchingMessageService
 from agents.state import AgentState
 
 
@@ -159,6 +161,51 @@ def test_no_triggers_for_healthy_state(rule_engine):
     assert len(triggers) == 0
 
 
+def test_evaluate_rules_batch_matches_single(rule_engine, high_cognitive_load_state,
+                                             low_performance_state, negative_mood_state):
+    """Test that batch evaluation returns the per-state results in order."""
+    states = [high_cognitive_load_state, low_performance_state, negative_mood_state]
+    
+    batch = rule_engine.evaluate_rules_batch(states)
+    
+    assert len(batch) == len(states)
+    for state, triggers in zip(states, batch):
+        single = rule_engine.evaluate_rules(state)
+        assert [(t.intervention_type, t.priority) for t in triggers] == \
+            [(t.intervention_type, t.priority) for t in single]
+
+
+def test_equal_priority_triggers_keep_rule_category_order(rule_engine):
+    """Test that ties across intervention types follow the rule category order."""
+    base_state = {
+        'student_id': 'student_123',
+        'session_id': 'session_456',
+        'last_intervention_time': 0
+    }
+    cases = [
+        (
+            {'cognitive_patterns': {'error_clustering_detected': True}, 'dropout_risk_score': 0.7},
+            [InterventionType.TOPIC_SWITCH, InterventionType.ENCOURAGEMENT]
+        ),
+        (
+            {'quiz_accuracy': 30, 'mood_score': -0.8, 'dropout_risk_score': 0.7},
+            [
+                InterventionType.DIFFICULTY_ADJUSTMENT,
+                InterventionType.RECAP_PROMPT,
+                InterventionType.ENCOURAGEMENT
+            ]
+        ),
+        (
+            {'cognitive_patterns': {'error_clustering_detected': True}, 'session_duration_minutes': 95},
+            [InterventionType.TOPIC_SWITCH, InterventionType.BREAK_SUGGESTION]
+        ),
+    ]
+    
+    for overrides, expected in cases:
+        triggers = rule_engine.evaluate_rules({**base_state, **overrides})
+        assert [t.intervention_type for t in triggers] == expected
+
+
 # ============================================================================
 # Throttling Tests
 # ============================================================================
@@ -314,6 +361,47 @@ async def test_agent_handles_missing_state_fields(motivation_agent):
     assert 'interventions_triggered' in result
 
 
+@pytest.mark.asyncio
+async def test_batching_service_coalesces_concurrent_requests(motivation_agent):
+    """Test that concurrent message requests share one batched generation."""
+    generator = motivation_agent.message_generator
+    batcher = BatchingMessageService(generator, max_batch_size=8, flush_interval_ms=20)
+    
+    with patch.object(generator, 'generate_messages_batch', new_callable=AsyncMock) as mock_batch:
+        mock_batch.side_effect = lambda items: [f"message {ctx['n']}" for _, ctx, _ in items]
+        
+        messages = await asyncio.gather(*(
+            batcher.generate_message(InterventionType.ENCOURAGEMENT, {'n': n}, {})
+            for n in range(3)
+        ))
+        await batcher.stop()
+    
+    assert messages == ["message 0", "message 1", "message 2"]
+    mock_batch.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_batching_service_stop_cancels_in_flight_requests(motivation_agent):
+    """Test that stopping the service resolves requests already being generated."""
+    generator = motivation_agent.message_generator
+    batcher = BatchingMessageService(generator, max_batch_size=1, flush_interval_ms=20)
+    generating = asyncio.Event()
+    
+    async def never_finishes(items):
+        generating.set()
+        await asyncio.Event().wait()
+    
+    with patch.object(generator, 'generate_messages_batch', side_effect=never_finishes):
+        request = asyncio.create_task(
+            batcher.generate_message(InterventionType.ENCOURAGEMENT, {}, {})
+        )
+        await asyncio.wait_for(generating.wait(), timeout=1)
+        await batcher.stop()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(request, timeout=1)
+
+
 @pytest.mark.asyncio
 async def test_fallback_message_on_llm_failure(motivation_agent):
     """Test that fallback messages are used when LLM fails."""
@@ -366,5 +454,35 @@ def test_intervention_deduplication(rule_engine):
     assert break_triggers[0].priority == InterventionPriority.CRITICAL
 
 
+def test_intervention_deduplication_prefers_confidence_on_tie(rule_engine):
+    """Test that equal-priority duplicates keep the more confident trigger."""
+    triggers = [
+        InterventionTrigger(
+            intervention_type=InterventionType.ENCOURAGEMENT,
+            priority=InterventionPriority.HIGH,
+            trigger_reason="High dropout risk",
+            context={},
+            confidence=0.8
+        ),
+        InterventionTrigger(
+            intervention_type=InterventionType.ENCOURAGEMENT,
+            priority=InterventionPriority.HIGH,
+            trigger_reason="Negative mood",
+            context={},
+            confidence=0.85
+        ),
+    ]
+    
+    state = {
+        'last_intervention_time': 0,
+        'student_id': 'student_123'
+    }
+    
+    filtered = rule_engine._deduplicate_interventions(triggers, state)
+    
+    assert len(filtered) == 1
+    assert filtered[0].trigger_reason == "Negative mood"
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
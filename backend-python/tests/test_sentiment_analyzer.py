@@ -7,9 +7,11 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 from ml.sentiment_analyzer import (
     MoodAnalyzer,
+    MoodHistory,
     TypingPatternMoodDetector,
     MoodTrendAnalyzer
 )
@@ -111,6 +113,65 @@ class TestMoodAnalyzer:
         assert -0.2 <= result['mood_score'] <= 0.2
         assert 'explanation' in result
     
+    def test_cached_result_skips_llm(self, mood_analyzer, neutral_text):
+        """Test repeated and trivially reworded texts reuse the cached result."""
+        mock_response = MagicMock()
+        mock_response.content = '''{
+            "dominant_emotion": "neutral",
+            "confidence": 0.6,
+            "mood_score": 0.0,
+            "explanation": "Neutral technical language"
+        }'''
+        mood_analyzer.llm.invoke = MagicMock(return_value=mock_response)
+        
+        first = mood_analyzer.analyze_text(neutral_text)
+        second = mood_analyzer.analyze_text(neutral_text.upper().rstrip('.'))
+        
+        assert mood_analyzer.llm.invoke.call_count == 1
+        assert second == first
+    
+    def test_analyze_batch(self, mood_analyzer, positive_text, neutral_text):
+        """Test batch analysis sends unique texts to the LLM in one call."""
+        mock_response = MagicMock()
+        mock_response.content = '''{
+            "dominant_emotion": "engaged",
+            "confidence": 0.7,
+            "mood_score": 0.4,
+            "explanation": "Engaged language"
+        }'''
+        mood_analyzer.llm.batch = MagicMock(return_value=[mock_response, RuntimeError("quota")])
+        
+        results = mood_analyzer.analyze_batch([positive_text, "", neutral_text, positive_text])
+        
+        assert mood_analyzer.llm.batch.call_count == 1
+        assert len(mood_analyzer.llm.batch.call_args[0][0]) == 2
+        assert results[0]['dominant_emotion'] == 'engaged'
+        assert results[1]['explanation'] == 'Empty text'
+        assert results[2]['dominant_emotion'] == 'neutral'
+        assert results[3] == results[0]
+    
+    def test_lexicon_scores_short_text_without_llm(self, mood_analyzer):
+        """Test short polarized texts are scored locally and negations reach the LLM."""
+        mock_response = MagicMock()
+        mock_response.content = '''{
+            "dominant_emotion": "confused",
+            "confidence": 0.7,
+            "mood_score": -0.3,
+            "explanation": "Negated positive"
+        }'''
+        mood_analyzer.llm.invoke = MagicMock(return_value=mock_response)
+        
+        result = mood_analyzer.analyze_text("Ugh, so confusing!")
+        
+        assert mood_analyzer.llm.invoke.call_count == 0
+        assert result['mood_score'] < 0
+        assert result['dominant_emotion'] == 'frustrated'
+        
+        result = mood_analyzer.analyze_text("Not easy")
+        
+        assert mood_analyzer.llm.invoke.call_count == 1
+        assert result['dominant_emotion'] == 'confused'
+    
     def test_empty_text_handling(self, mood_analyzer):
         """Test handling of empty text."""
         result = mood_analyzer.analyze_text("")
@@ -193,12 +254,12 @@ class TestMoodTrendAnalyzer:
     def test_positive_mood_trend(self, trend_analyzer):
         """Test detection of improving mood."""
         # Mock get_mood_history to return test data
-        mood_history = [
-            {'timestamp': 1000, 'mood_score': -0.5},
-            {'timestamp': 2000, 'mood_score': -0.2},
-            {'timestamp': 3000, 'mood_score': 0.1},
-            {'timestamp': 4000, 'mood_score': 0.4}
-        ]
+        mood_history = MoodHistory.from_samples([
+            (1000, -0.5),
+            (2000, -0.2),
+            (3000, 0.1),
+            (4000, 0.4)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=mood_history)
         
         result = trend_analyzer.calculate_mood_trend('test_student', window_minutes=30)
@@ -208,12 +269,12 @@ class TestMoodTrendAnalyzer:
     
     def test_negative_mood_trend(self, trend_analyzer):
         """Test detection of declining mood."""
-        mood_history = [
-            {'timestamp': 1000, 'mood_score': 0.6},
-            {'timestamp': 2000, 'mood_score': 0.3},
-            {'timestamp': 3000, 'mood_score': 0.0},
-            {'timestamp': 4000, 'mood_score': -0.3}
-        ]
+        mood_history = MoodHistory.from_samples([
+            (1000, 0.6),
+            (2000, 0.3),
+            (3000, 0.0),
+            (4000, -0.3)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=mood_history)
         
         result = trend_analyzer.calculate_mood_trend('test_student', window_minutes=30)
@@ -223,12 +284,12 @@ class TestMoodTrendAnalyzer:
     
     def test_stable_mood_trend(self, trend_analyzer):
         """Test detection of stable mood."""
-        mood_history = [
-            {'timestamp': 1000, 'mood_score': 0.3},
-            {'timestamp': 2000, 'mood_score': 0.35},
-            {'timestamp': 3000, 'mood_score': 0.32},
-            {'timestamp': 4000, 'mood_score': 0.33}
-        ]
+        mood_history = MoodHistory.from_samples([
+            (1000, 0.3),
+            (2000, 0.35),
+            (3000, 0.32),
+            (4000, 0.33)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=mood_history)
         
         result = trend_analyzer.calculate_mood_trend('test_student', window_minutes=30)
@@ -238,12 +299,12 @@ class TestMoodTrendAnalyzer:
     
     def test_mood_drop_detection(self, trend_analyzer):
         """Test detection of significant mood drop."""
-        recent_history = [
-            {'timestamp': 1000, 'mood_score': 0.6},
-            {'timestamp': 2000, 'mood_score': 0.5},
-            {'timestamp': 3000, 'mood_score': 0.4},
-            {'timestamp': 4000, 'mood_score': -0.5}
-        ]
+        recent_history = MoodHistory.from_samples([
+            (1000, 0.6),
+            (2000, 0.5),
+            (3000, 0.4),
+            (4000, -0.5)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=recent_history)
         
         result = trend_analyzer.detect_mood_drop('test_student', minutes=15)
@@ -254,12 +315,12 @@ class TestMoodTrendAnalyzer:
     
     def test_no_mood_drop(self, trend_analyzer):
         """Test when no significant mood drop occurs."""
-        recent_history = [
-            {'timestamp': 1000, 'mood_score': 0.35},
-            {'timestamp': 2000, 'mood_score': 0.4},
-            {'timestamp': 3000, 'mood_score': 0.38},
-            {'timestamp': 4000, 'mood_score': 0.3}
-        ]
+        recent_history = MoodHistory.from_samples([
+            (1000, 0.35),
+            (2000, 0.4),
+            (3000, 0.38),
+            (4000, 0.3)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=recent_history)
         
         result = trend_analyzer.detect_mood_drop('test_student', minutes=15)
@@ -267,11 +328,74 @@ class TestMoodTrendAnalyzer:
         assert result['drop_detected'] is False
         assert result['intervention_needed'] is False
     
+    def test_mood_summary_fetches_history_once(self, trend_analyzer):
+        """Test summary derives trend and drop data from a single history fetch."""
+        now_ms = int(datetime.now().timestamp() * 1000)
+        history = MoodHistory.from_samples([
+            (now_ms - 25 * 60000, -0.8),
+            (now_ms - 10 * 60000, 0.6),
+            (now_ms - 5 * 60000, 0.4),
+            (now_ms - 1 * 60000, -0.3)
+        ])
+        trend_analyzer.get_mood_history = MagicMock(return_value=history)
+        
+        result = trend_analyzer.get_mood_summary('test_student')
+        
+        trend_analyzer.get_mood_history.assert_called_once_with('test_student', 30)
+        assert result['current_mood'] == -0.3
+        assert result['data_points'] == 4
+        # Drop is measured from the first entry inside the 15-minute window
+        assert result['mood_drop_alert'] is True
+        assert result['intervention_needed'] is True
+    
+    def test_mood_summary_from_rolling_window(self, trend_analyzer):
+        """Test summaries without Redis come from the in-process rolling window."""
+        now_ms = int(datetime.now().timestamp() * 1000)
+        samples = [
+            (now_ms - 45 * 60000, 0.9),  # Outside the 30-minute window
+            (now_ms - 25 * 60000, -0.8),
+            (now_ms - 10 * 60000, 0.6),
+            (now_ms - 5 * 60000, 0.4),
+            (now_ms - 1 * 60000, -0.3)
+        ]
+        for timestamp, score in samples:
+            trend_analyzer.store_mood_score('test_student', score, timestamp)
+        
+        result = trend_analyzer.get_mood_summary('test_student')
+        expected = trend_analyzer._calculate_mood_trend_from_history(
+            MoodHistory.from_samples(samples[1:])
+        )
+        
+        assert result['data_points'] == 4
+        assert result['current_mood'] == -0.3
+        assert result['avg_mood_30min'] == pytest.approx(expected['avg_mood'])
+        assert result['trend_slope'] == pytest.approx(expected['slope'])
+        assert result['mood_drop_alert'] is True
+        assert result['intervention_needed'] is True
+    
+    def test_equal_mood_scores_are_kept(self):
+        """Test samples with the same mood score are stored as separate members."""
+        redis_client = MagicMock()
+        pipe = redis_client.pipeline.return_value
+        analyzer = MoodTrendAnalyzer(redis_client)
+        
+        analyzer.store_mood_score('test_student', 0.5, timestamp=1000)
+        analyzer.store_mood_score('test_student', 0.5, timestamp=2000)
+        
+        members = [call.args[1] for call in pipe.zadd.call_args_list]
+        assert members == [{'1000:0.5': 1000}, {'2000:0.5': 2000}]
+        
+        redis_client.zrangebyscore.return_value = [(b'1000:0.5', 1000.0), (b'2000:0.5', 2000.0), ('-0.25', 500.0)]
+        history = analyzer.get_mood_history('test_student', 30)
+        
+        assert list(history.timestamps) == [500, 1000, 2000]
+        assert list(history.scores) == [-0.25, 0.5, 0.5]
+    
     def test_insufficient_history(self, trend_analyzer):
         """Test trend analysis with insufficient data."""
-        mood_history = [
-            {'timestamp': 1000, 'mood_score': 0.5}
-        ]
+        mood_history = MoodHistory.from_samples([
+            (1000, 0.5)
+        ])
         trend_analyzer.get_mood_history = MagicMock(return_value=mood_history)
         
         result = trend_analyzer.calculate_mood_trend('test_student', window_minutes=30)
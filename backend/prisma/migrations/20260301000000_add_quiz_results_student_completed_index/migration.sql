@@ -0,0 +1,5 @@
+-- DropIndex
+DROP INDEX "quiz_results_studentId_idx";
+
+-- CreateIndex
+CREATE INDEX "quiz_results_studentId_completedAt_idx" ON "quiz_results"("studentId", "completedAt");